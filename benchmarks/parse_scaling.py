@@ -0,0 +1,49 @@
+"""
+Measure how LogParser.parse_parallel scales from one worker to N.
+
+    python benchmarks/parse_scaling.py --size-mb 200 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_parser import LogParser  # noqa: E402
+from synthetic_log import write_guidance_log  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--size-mb", type=float, default=100)
+    arg_parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--lazy", action="store_true", help="index only")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.log")
+        write_guidance_log(path, int(args.size_mb * 1024**2))
+        size_mb = os.path.getsize(path) / 1024**2
+
+        parser = LogParser()
+        baseline = None
+        print(f"{'workers':>7} {'seconds':>8} {'MB/s':>8} {'speedup':>8}")
+        for workers in range(1, args.max_workers + 1):
+            start = time.perf_counter()
+            if workers == 1:
+                messages = parser.parse(path, lazy=args.lazy)
+            else:
+                messages = parser.parse_parallel(path, workers, lazy=args.lazy)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"{workers:>7} {elapsed:>8.2f} {size_mb / elapsed:>8.1f}"
+                f" {baseline / elapsed:>7.2f}x   ({len(messages)} entries)"
+            )
+            messages.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Benchmark parsing, filtering and rendering on a synthetic Guidance log.
+
+    python benchmarks/run_benchmarks.py --size 200MB
+    python benchmarks/run_benchmarks.py --size 200MB --save-baseline
+    python benchmarks/run_benchmarks.py --size 200MB --fail-on-regression
+
+Each stage runs in a fresh process so its peak RSS is its own. Results are
+compared with the stored baseline (benchmarks/baseline.json by default) when
+there is one; a metric more than --tolerance worse is flagged.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_indexes import LogIndexes  # noqa: E402
+from log_parser import LogParser  # noqa: E402
+from synthetic_log import parse_size, write_guidance_log  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+REPEATS = 5
+NOISE_FLOOR_MS = 1.0  # latency changes smaller than this are never flagged
+RENDER_SCROLLS = 50
+# Metrics where a larger value is better; for all others smaller is better
+HIGHER_IS_BETTER = ("parse_eager_mb_s", "parse_lazy_mb_s")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def median_ms(function, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def bench_parse(path, lazy):
+    name = "parse_lazy" if lazy else "parse_eager"
+    size_mb = os.path.getsize(path) / 1024**2
+    start = time.perf_counter()
+    messages = LogParser().parse(path, lazy=lazy)
+    elapsed = time.perf_counter() - start
+    results = {
+        f"{name}_mb_s": size_mb / elapsed,
+        f"{name}_peak_rss_mb": peak_rss_mb(),
+    }
+    messages.close()
+    return results
+
+
+def bench_filter(path):
+    messages = LogParser().parse_mapped(path)
+    indexes = LogIndexes(messages)
+    start = time.perf_counter()
+    indexes.extend()
+    results = {"index_build_s": time.perf_counter() - start}
+
+    all_levels = range(len(messages.levels))
+    all_modules = range(len(messages.modules))
+    low, high = messages.get_time_range()
+    narrow_end = low + (high - low) / 100
+    rows = len(messages)
+    scenarios = {
+        "filter_all_ms": (all_levels, all_modules, low, high),
+        "filter_level_ms": ([messages.levels.index("error")], all_modules, low, high),
+        "filter_module_ms": (all_levels, [0], low, high),
+        "filter_window_ms": (all_levels, all_modules, low, narrow_end),
+    }
+    for metric, (level_codes, module_codes, start_time, end_time) in scenarios.items():
+
+        def select():
+            # Measure cold selections, not the per-code posting cache
+            indexes.filter_index._cache.clear()
+            indexes.select(level_codes, module_codes, start_time, end_time, rows)
+
+        results[metric] = median_ms(select)
+
+    start = time.perf_counter()
+    indexes.search_index.extend()
+    results["search_index_build_s"] = time.perf_counter() - start
+    every_row = range(rows)
+
+    def search_cold():
+        # An uncached query, waiting for the worker to confirm every row
+        indexes.search_index._queries.clear()
+        while not indexes.search_index.search("Result.Error", every_row)[1]:
+            time.sleep(0.001)
+
+    results["search_cold_ms"] = median_ms(search_cold)
+    results["search_ms"] = median_ms(
+        lambda: indexes.search_index.search("Result.Error", every_row)
+    )
+    results["filter_peak_rss_mb"] = peak_rss_mb()
+    messages.close()
+    return results
+
+
+def bench_render(path):
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception as e:
+        print(f"Skipping render benchmark: {e}")
+        return {}
+    root.withdraw()
+
+    from gui_components import GUIComponents
+
+    gui = GUIComponents(root)
+    gui.create_frames()
+    gui.create_log_display(lambda event: None)
+    messages = LogParser().parse_mapped(path)
+    rows = range(len(messages))
+
+    start = time.perf_counter()
+    gui.populate_log_tree(messages, rows)
+    root.update_idletasks()
+    results = {"render_populate_ms": (time.perf_counter() - start) * 1000}
+
+    positions = [
+        len(messages) * step // RENDER_SCROLLS for step in range(RENDER_SCROLLS)
+    ]
+    timings = []
+    for position in positions:
+        start = time.perf_counter()
+        gui.log_table.scroll_to(position)
+        root.update_idletasks()
+        timings.append((time.perf_counter() - start) * 1000)
+    results["render_scroll_ms"] = statistics.median(timings)
+    root.destroy()
+    messages.close()
+    return results
+
+
+def run_stages(path):
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    stages = [
+        (bench_parse, (path, False)),
+        (bench_parse, (path, True)),
+        (bench_filter, (path,)),
+        (bench_render, (path,)),
+    ]
+    for function, args in stages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.update(executor.submit(function, *args).result())
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print results next to the baseline and return the regressed metrics.
+    """
+    regressions = []
+    print(f"{'metric':<24} {'value':>10} {'baseline':>10} {'change':>8}")
+    for metric, value in results.items():
+        if value is None:
+            continue
+        base = baseline.get(metric)
+        if base is None or not base:
+            print(f"{metric:<24} {value:>10.2f}")
+            continue
+        change = (value - base) / base
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        noise = metric.endswith("_ms") and abs(value - base) < NOISE_FLOOR_MS
+        flag = "  REGRESSION" if worse > tolerance and not noise else ""
+        if flag:
+            regressions.append(metric)
+        print(f"{metric:<24} {value:>10.2f} {base:>10.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--size", type=parse_size, default="100MB")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--log", help="benchmark this log, not a synthetic one")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    arg_parser.add_argument(
+        "--save-baseline", action="store_true", help="store these results as baseline"
+    )
+    arg_parser.add_argument("--tolerance", type=float, default=0.1)
+    arg_parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="exit with status 1 when a metric regressed",
+    )
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.log
+        if path is None:
+            path = os.path.join(tmp, "guidance.log")
+            start = time.perf_counter()
+            entries = write_guidance_log(path, args.size, args.seed)
+            print(
+                f"Generated {entries} entries ({args.size / 1024**2:.0f} MB) in"
+                f" {time.perf_counter() - start:.1f}s"
+            )
+        results = run_stages(path)
+        setup = {"log": args.log, "size": os.path.getsize(path), "seed": args.seed}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("setup") != setup:
+            print(f"Baseline was recorded with {stored.get('setup')}, not {setup}")
+        baseline = stored.get("results", {})
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"setup": setup, "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
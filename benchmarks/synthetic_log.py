@@ -0,0 +1,183 @@
+"""
+Write seeded synthetic Guidance logs for benchmarks.
+
+    python benchmarks/synthetic_log.py /tmp/guidance.log --size 500MB --seed 1
+
+The same seed and size always produce the same file (times are written
+in UTC so the time zone does not matter). Entries follow the
+[timestamp][level][module] message layout, with TrajectoryGenerator
+payloads shaped like the saved ones, multi-line continuations and the
+occasional entry that arrives a little late.
+"""
+import argparse
+import random
+import re
+import time
+
+LEVELS = ["debug", "info", "warning", "error"]
+LEVEL_WEIGHTS = [60, 30, 7, 3]
+MODULES = [
+    "TrajectoryGenerator",
+    "Guidance",
+    "trajectory_manager",
+    "PathFollower",
+    "Localization",
+]
+MODULE_WEIGHTS = [25, 30, 15, 15, 15]
+COMPONENTS = ["trajectory_manager", "path_follower", "localization", "mission"]
+STATES = ["IDLE", "TAKEOFF", "CRUISE", "HOVER", "LANDING"]
+WRITE_BYTES = 1024 * 1024  # text buffered before each write
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+def parse_size(text):
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?B?)\s*", text.upper())
+    if not match:
+        raise ValueError(f"unrecognised size: {text!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+class GuidanceLogWriter:
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.timestamp = 1733746700.0
+        self.position = [7.2695e06, 756768.0, 1993.0]
+        self.heading = -46.78
+        self._second = None
+        self._second_text = ""
+
+    def entries(self):
+        rng = self.rng
+        while True:
+            self.timestamp += rng.expovariate(200.0)
+            timestamp = self.timestamp
+            if rng.random() < 0.001:
+                timestamp -= rng.uniform(0.001, 0.05)  # logged late by another thread
+            module = rng.choices(MODULES, MODULE_WEIGHTS)[0]
+            level = rng.choices(LEVELS, LEVEL_WEIGHTS)[0]
+            lines = [f"[{self._format_time(timestamp)}][{level}][{module}] "]
+            lines.append(self._message(module))
+            lines.append("\n")
+            if rng.random() < 0.05:
+                lines.extend(self._continuation_lines())
+            yield "".join(lines)
+
+    def _format_time(self, timestamp):
+        second = int(timestamp)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.gmtime(second)
+            )
+        return f"{self._second_text}.{int((timestamp - second) * 1000):03d}"
+
+    def _message(self, module):
+        rng = self.rng
+        if module == "TrajectoryGenerator":
+            segments = ", ".join(
+                self._segment() for _ in range(rng.choice((1, 1, 1, 2, 3)))
+            )
+            return f"Trajectory generated: {{{segments}}}"
+        if module == "Guidance":
+            if rng.random() < 0.7:
+                return (
+                    f"update_component on '{rng.choice(COMPONENTS)}'': "
+                    f"Result.{'Ok' if rng.random() < 0.95 else 'Error'}"
+                )
+            return f"State changed to {rng.choice(STATES)}"
+        if module == "Localization":
+            x, y, z = self._walk()
+            return (
+                f"Pose estimate: {{x = {x:g}, y = {y:g}, z = {z:g}}}, "
+                f"covariance: {rng.uniform(0, 2):g}"
+            )
+        return (
+            f"Heading: {self.heading:g}, cross track error: {rng.gauss(0, 0.3):g}, "
+            f"speed: {rng.uniform(0, 1.5):g}"
+        )
+
+    def _segment(self):
+        rng = self.rng
+        start = self._walk()
+        end = self._walk()
+        middle = self._walk()
+        self.heading = (self.heading + rng.gauss(0, 5) + 180) % 360 - 180
+        velocity = round(rng.choice((0.5, 0.8, 1.0)), 1)
+        ramp = velocity  # accelerating at 1 m/s^2 takes `velocity` seconds
+        cruise = rng.choice((rng.uniform(0.5, 10), rng.uniform(1e4, 4e5)))
+        profile = " ".join(
+            f"{{Initial velocity: {initial:g}, Desired acceleration: {acceleration}, "
+            f"Duration: {duration:g} seconds}}"
+            for initial, acceleration, duration in (
+                (0, 1, ramp),
+                (velocity, 0, cruise),
+                (velocity, -1, ramp),
+            )
+        )
+        return (
+            "{Segment: {"
+            f"Start point: {{x = {start[0]:g}, y = {start[1]:g}, z = {start[2]:g}}}, "
+            f"End point: {{x = {end[0]:g}, y = {end[1]:g}, z = {end[2]:g}}}, "
+            "Intermediate point: "
+            f"{{x = {middle[0]:g}, y = {middle[1]:g}, z = {middle[2]:g}}}, "
+            f"Heading: {self.heading:g}, is_altitude: 0, "
+            "is_arc_with_heading_relative_to_path: 0, wait time: 0, "
+            f"Velocity profile: {profile}}}}}"
+        )
+
+    def _walk(self):
+        rng = self.rng
+        self.position[0] += rng.gauss(0, 3)
+        self.position[1] += rng.gauss(0, 3)
+        self.position[2] += rng.gauss(0, 0.02)
+        return tuple(self.position)
+
+    def _continuation_lines(self):
+        rng = self.rng
+        kind = rng.random()
+        if kind < 0.5:
+            return [
+                f"    at frame {depth}: guidance::{rng.choice(COMPONENTS)}::step()\n"
+                for depth in range(rng.randint(1, 4))
+            ]
+        if kind < 0.8:
+            return [f"  waypoint {i}: {{x = {self._walk()[0]:g}}}\n" for i in range(3)]
+        # Looks like a header at a glance but is not one
+        return [f"[detail] retry {rng.randint(1, 5)} pending\n"]
+
+
+def write_guidance_log(path, size_bytes, seed=0):
+    """
+    Write about `size_bytes` of log to `path` and return the entry count.
+    """
+    entries = GuidanceLogWriter(seed).entries()
+    written = 0
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        while written < size_bytes:
+            block = []
+            block_bytes = 0
+            while block_bytes < WRITE_BYTES and written + block_bytes < size_bytes:
+                entry = next(entries)
+                block.append(entry)
+                block_bytes += len(entry)
+            count += len(block)
+            f.write("".join(block))
+            written += block_bytes
+    return count
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("path")
+    arg_parser.add_argument("--size", type=parse_size, default="100MB")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    count = write_guidance_log(args.path, args.size, args.seed)
+    print(f"wrote {count} entries in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
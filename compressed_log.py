@@ -0,0 +1,272 @@
+import gzip
+import lzma
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+
+COMPRESSED_SUFFIXES = (".gz", ".zst", ".xz")
+READ_BYTES = 256 * 1024  # compressed bytes fed to the decompressor at a time
+CHUNK_BYTES = 1024 * 1024  # decompressed bytes per cached chunk
+CACHED_CHUNKS = 16
+LIVE_STREAMS = 2  # sequential readers kept going, e.g. the indexer and the UI
+CHECKPOINT_BYTES = 4 * 1024 * 1024  # decompressed bytes between gzip seek points
+
+
+def is_compressed(file_path):
+    return file_path.lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def open_text(file_path):
+    # Text-mode open that decompresses while reading
+    lowered = file_path.lower()
+    if lowered.endswith(".gz"):
+        return gzip.open(file_path, "rt")
+    if lowered.endswith(".xz"):
+        return lzma.open(file_path, "rt")
+    if lowered.endswith(".zst"):
+        return _zstandard().open(file_path, "rt")
+    return open(file_path, "r")
+
+
+def new_decompressor(file_path):
+    suffix = file_path.lower().rsplit(".", 1)[-1]
+    if suffix == "gz":
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if suffix == "xz":
+        return lzma.LZMADecompressor()
+    return _zstandard().ZstdDecompressor().decompressobj()
+
+
+def _zstandard():
+    # Optional dependency, only imported once a .zst log is opened
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("reading .zst logs needs the zstandard package")
+    return zstandard
+
+
+class _Stream:
+    """
+    Sequential decompression from a seek point. Concatenated gzip members,
+    zstd frames and xz streams are decoded one after another.
+    """
+
+    def __init__(self, file, file_path, in_offset, out_offset, decompressor):
+        self.file = file
+        self.file_path = file_path
+        self.in_offset = in_offset
+        self.out_offset = out_offset  # offset of the first pending byte
+        self.decompressor = decompressor or new_decompressor(file_path)
+        self.pending = bytearray()
+        self.finished = False
+        self.member_starts = []  # (out offset, in offset) of later members
+
+    def fill(self):
+        self.file.seek(self.in_offset)
+        data = self.file.read(READ_BYTES)
+        if not data:
+            self.finished = True
+            return
+        self.in_offset += len(data)
+        while data:
+            if self.decompressor.eof:
+                if not data.strip(b"\0"):
+                    break  # trailing padding
+                # Another member or frame follows; it can be decoded on its own
+                self.member_starts.append(
+                    (self.out_offset + len(self.pending), self.in_offset - len(data))
+                )
+                self.decompressor = new_decompressor(self.file_path)
+            self.pending += self.decompressor.decompress(data)
+            if not self.decompressor.eof:
+                break
+            data = self.decompressor.unused_data
+
+    def read(self, size):
+        while len(self.pending) < size and not self.finished:
+            self.fill()
+        data = bytes(self.pending[:size])
+        del self.pending[:size]
+        self.out_offset += len(data)
+        return data
+
+    def skip(self, size):
+        while size > 0 and not (self.finished and not self.pending):
+            if not self.pending:
+                self.fill()
+            taken = min(size, len(self.pending))
+            del self.pending[:taken]
+            self.out_offset += taken
+            size -= taken
+
+
+class CompressedLog:
+    """
+    Random access to the decompressed text of a .gz, .zst or .xz log with
+    the parts of the mmap interface the parser and the store use (len,
+    slicing, seek/readline, find/rfind, close).
+
+    Opening makes one streaming pass to learn the decompressed size and to
+    record seek points: every gzip member, zstd frame and xz stream start,
+    plus a copy of the zlib state every few MiB inside gzip members. Reads
+    are served from a small cache of decompressed chunks; a chunk is decoded
+    from the nearest seek point, or by simply continuing when reads are
+    sequential, so indexing decompresses the file once more in a single
+    pass and a lazy body costs at most a few MiB of decompression.
+
+    The xz and zstd decompressors cannot be copied, so inside a stream or
+    frame there are no seek points, and an ordinary single-stream .xz or
+    single-frame .zst file would decode from its start on every cache miss.
+    When the scan finds gaps that wide, the decompressed text is kept in
+    memory instead, at the cost of holding the whole text.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        self._checkpoints = []  # (out offset, in offset, decompressor or None)
+        self._chunks = OrderedDict()  # chunk number -> decompressed bytes
+        self._streams = OrderedDict()  # next output offset -> live stream
+        self._lock = threading.Lock()  # bodies are read while indexing runs
+        self._position = 0
+        self._text = None  # the whole decompressed text, when kept
+        self.size = self._scan()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self._read(index, index + 1)[0]
+        start, end, step = index.indices(self.size)
+        if step != 1:
+            raise ValueError("compressed logs only support contiguous slices")
+        return self._read(start, end)
+
+    def seek(self, position):
+        self._position = position
+
+    def readline(self):
+        parts = []
+        position = self._position
+        while position < self.size:
+            number, offset = divmod(position, CHUNK_BYTES)
+            chunk = self._chunk(number)
+            newline = chunk.find(b"\n", offset)
+            end = len(chunk) if newline == -1 else newline + 1
+            parts.append(chunk[offset:end])
+            position += end - offset
+            if newline != -1:
+                break
+        self._position = position
+        return b"".join(parts)
+
+    def find(self, sub, start=0, end=None):
+        end = self.size if end is None else min(end, self.size)
+        position = max(start, 0)
+        while position < end:
+            # Overlap windows so a match across a chunk edge is not missed
+            window_end = min(end, position + CHUNK_BYTES + len(sub) - 1)
+            found = self._read(position, window_end).find(sub)
+            if found != -1:
+                return position + found
+            if window_end == end:
+                break
+            position += CHUNK_BYTES
+        return -1
+
+    def rfind(self, sub, start=0, end=None):
+        end = self.size if end is None else min(end, self.size)
+        start = max(start, 0)
+        while end > start:
+            window_start = max(start, end - CHUNK_BYTES - len(sub) + 1)
+            found = self._read(window_start, end).rfind(sub)
+            if found != -1:
+                return window_start + found
+            if window_start == start:
+                break
+            end -= CHUNK_BYTES
+        return -1
+
+    def close(self):
+        self._file.close()
+        self._text = None
+        self._chunks.clear()
+        self._streams.clear()
+
+    def _scan(self):
+        stream = _Stream(self._file, self.file_path, 0, 0, None)
+        self._checkpoints.append((0, 0, None))
+        next_checkpoint = CHECKPOINT_BYTES
+        copyable = hasattr(stream.decompressor, "copy")
+        # Kept until the scan shows whether members alone are close enough
+        text = None if copyable else bytearray()
+        while not stream.finished:
+            stream.fill()
+            stream.out_offset += len(stream.pending)
+            if text is not None:
+                text += stream.pending
+            stream.pending.clear()
+            for out_offset, in_offset in stream.member_starts:
+                self._checkpoints.append((out_offset, in_offset, None))
+                next_checkpoint = out_offset + CHECKPOINT_BYTES
+            stream.member_starts.clear()
+            if stream.out_offset >= next_checkpoint and copyable:
+                self._checkpoints.append(
+                    (stream.out_offset, stream.in_offset, stream.decompressor.copy())
+                )
+                next_checkpoint = stream.out_offset + CHECKPOINT_BYTES
+        self._checkpoint_offsets = [checkpoint[0] for checkpoint in self._checkpoints]
+        if text is not None:
+            ends = self._checkpoint_offsets[1:] + [stream.out_offset]
+            gaps = map(int.__sub__, ends, self._checkpoint_offsets)
+            if max(gaps) > CHECKPOINT_BYTES:
+                self._text = text
+        return stream.out_offset
+
+    def _read(self, start, end):
+        if end <= start:
+            return b""
+        if self._text is not None:
+            return bytes(self._text[start:end])
+        first, last = start // CHUNK_BYTES, (end - 1) // CHUNK_BYTES
+        data = b"".join(self._chunk(number) for number in range(first, last + 1))
+        offset = first * CHUNK_BYTES
+        return data[start - offset : end - offset]
+
+    def _chunk(self, number):
+        if self._text is not None:
+            start = number * CHUNK_BYTES
+            return bytes(self._text[start : start + CHUNK_BYTES])
+        with self._lock:
+            chunk = self._chunks.get(number)
+            if chunk is not None:
+                self._chunks.move_to_end(number)
+                return chunk
+
+            start = number * CHUNK_BYTES
+            stream = self._streams.pop(start, None)
+            if stream is None:
+                # Start from the closest seek point at or before the chunk
+                out_offset, in_offset, state = self._checkpoints[
+                    bisect_right(self._checkpoint_offsets, start) - 1
+                ]
+                stream = _Stream(
+                    self._file,
+                    self.file_path,
+                    in_offset,
+                    out_offset,
+                    state.copy() if state is not None else None,
+                )
+                stream.skip(start - out_offset)
+            chunk = stream.read(CHUNK_BYTES)
+            self._streams[stream.out_offset] = stream
+            if len(self._streams) > LIVE_STREAMS:
+                self._streams.popitem(last=False)
+
+            self._chunks[number] = chunk
+            if len(self._chunks) > CACHED_CHUNKS:
+                self._chunks.popitem(last=False)
+            return chunk
@@ -0,0 +1,185 @@
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+MAX_EXCLUDED_DELETES = 64  # above this, rebuild instead of deleting in place
+
+
+class FilterIndex:
+    """
+    Posting lists of row numbers for every level and module of a store.
+
+    A filter is answered from the postings of whichever dimension selects
+    fewer rows, checking the other dimension's code column only when part of
+    it is deselected, so toggling a module costs time proportional to that
+    module's rows rather than to the whole log. Filtered postings are cached
+    per code, so only the toggled code is recomputed.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.level_rows = []  # level code -> rows with that level
+        self.module_rows = []  # module code -> rows from that module
+        self.rows_indexed = 0
+        self._cache = {}
+
+    def extend(self, row_end=None):
+        """
+        Index the rows appended to the store since the last call.
+        """
+        messages = self.messages
+        row_end = len(messages) if row_end is None else row_end
+        start = self.rows_indexed
+        if row_end <= start:
+            return
+        level_rows, module_rows = self.level_rows, self.module_rows
+        while len(level_rows) < len(messages.levels):
+            level_rows.append(array("q"))
+        while len(module_rows) < len(messages.modules):
+            module_rows.append(array("q"))
+
+        level_codes = messages.level_codes[start:row_end]
+        module_codes = messages.module_codes[start:row_end]
+        for row, level_code, module_code in zip(
+            range(start, row_end), level_codes, module_codes
+        ):
+            level_rows[level_code].append(row)
+            module_rows[module_code].append(row)
+        self.rows_indexed = row_end
+
+    def select(
+        self, level_codes, module_codes, row_limit=None, window=None, source_codes=None
+    ):
+        """
+        Return the sorted rows below `row_limit` whose level code is in
+        `level_codes` and whose module code is in `module_codes`, restricted
+        to a TimeWindow when one is given and, for merged stores, to the
+        files in `source_codes` when given.
+        """
+        row_limit = self.rows_indexed if row_limit is None else row_limit
+        level_codes = frozenset(
+            code for code in level_codes if code < len(self.level_rows)
+        )
+        module_codes = frozenset(
+            code for code in module_codes if code < len(self.module_rows)
+        )
+        if not level_codes or not module_codes:
+            return array("q")
+
+        level_total = self._count(self.level_rows, level_codes, row_limit)
+        module_total = self._count(self.module_rows, module_codes, row_limit)
+        if level_total <= module_total:
+            primary, codes = ("level", level_codes)
+            check, check_codes = (self.messages.module_codes, module_codes)
+            check_all = len(module_codes) == len(self.module_rows)
+        else:
+            primary, codes = ("module", module_codes)
+            check, check_codes = (self.messages.level_codes, level_codes)
+            check_all = len(level_codes) == len(self.level_rows)
+
+        parts = [
+            self._filtered_posting(
+                primary, code, check, None if check_all else check_codes, row_limit
+            )
+            for code in sorted(codes)
+        ]
+        if window is not None:
+            low, high = window.row_low, window.row_high
+            parts = [
+                part[bisect_left(part, low) : bisect_left(part, high)]
+                for part in parts
+            ]
+        if len(parts) == 1:
+            rows = parts[0]
+        else:
+            # Each part is sorted, so this sort only merges runs
+            rows = array("q", sorted(chain.from_iterable(parts)))
+        if window is not None:
+            rows = self._patch_window(rows, window, level_codes, module_codes)
+        if source_codes is not None:
+            rows = self._filter_sources(rows, source_codes)
+        return rows
+
+    def counts(self, row_limit=None, window=None):
+        """
+        Return (level counts, module counts), lists indexed by code holding
+        the number of rows below `row_limit`, within a TimeWindow when one
+        is given. Each count is a pair of bisections on a posting list, so
+        no rows are scanned apart from the window's late rows.
+        """
+        row_limit = self.rows_indexed if row_limit is None else row_limit
+        if window is None:
+            low, high = 0, row_limit
+        else:
+            low, high = min(window.row_low, row_limit), min(window.row_high, row_limit)
+        level_counts = [
+            bisect_left(posting, high) - bisect_left(posting, low)
+            for posting in self.level_rows
+        ]
+        module_counts = [
+            bisect_left(posting, high) - bisect_left(posting, low)
+            for posting in self.module_rows
+        ]
+        if window is not None:
+            messages = self.messages
+            for rows, change in ((window.excluded, -1), (window.extra, 1)):
+                for row in rows:
+                    if row < row_limit:
+                        level_counts[messages.level_codes[row]] += change
+                        module_counts[messages.module_codes[row]] += change
+        return level_counts, module_counts
+
+    def _filter_sources(self, rows, source_codes):
+        # Sources are few and usually all selected, so the remaining rows
+        # are checked against the source column instead of keeping postings
+        source_column = self.messages.source_codes
+        source_codes = frozenset(source_codes)
+        if not source_column or source_codes.issuperset(
+            range(len(self.messages.sources))
+        ):
+            return rows
+        return array("q", (row for row in rows if source_column[row] in source_codes))
+
+    def _patch_window(self, rows, window, level_codes, module_codes):
+        # Drop late rows inside the span that fall outside the window, and
+        # add late rows from outside the span that fall inside it
+        if len(window.excluded) <= MAX_EXCLUDED_DELETES:
+            for row in sorted(window.excluded, reverse=True):
+                position = bisect_left(rows, row)
+                if position < len(rows) and rows[position] == row:
+                    del rows[position]
+        else:
+            excluded = window.excluded
+            rows = array("q", (row for row in rows if row not in excluded))
+
+        messages = self.messages
+        extra = [
+            row
+            for row in window.extra
+            if messages.level_codes[row] in level_codes
+            and messages.module_codes[row] in module_codes
+        ]
+        if extra:
+            rows = array("q", sorted(chain(rows, extra)))
+        return rows
+
+    def _filtered_posting(self, dimension, code, check, check_codes, row_limit):
+        key = (dimension, code)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == (check_codes, row_limit):
+            return cached[1]
+
+        postings = self.level_rows if dimension == "level" else self.module_rows
+        posting = postings[code]
+        end = bisect_left(posting, row_limit)
+        if check_codes is None:
+            rows = posting[:end]
+        else:
+            rows = array(
+                "q", (row for row in posting[:end] if check[row] in check_codes)
+            )
+        self._cache[key] = ((check_codes, row_limit), rows)
+        return rows
+
+    def _count(self, postings, codes, row_limit):
+        return sum(bisect_left(postings[code], row_limit) for code in codes)
@@ -1,6 +1,48 @@
+import os
 import tkinter as tk
 import tkinter.ttk as ttk
 
+from virtual_table import VirtualLogTable
+
+SEARCH_DELAY_MS = 250
+TEMPLATE_ROWS_SHOWN = 500  # rows listed under an expanded template
+HISTOGRAM_WIDTH = 200  # matches the time sliders below it
+HISTOGRAM_HEIGHT = 60
+RATE_CHART_WIDTH = 640
+RATE_CHART_HEIGHT = 160
+RATE_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"]
+STATS_COLUMNS = (
+    ("module", "Module", 160),
+    ("total", "Messages", 80),
+    ("rate", "Msg/s", 70),
+    ("peak", "Peak msg/s", 80),
+    ("peak_time", "Peak at", 100),
+    ("error", "Errors", 60),
+    ("warning", "Warnings", 70),
+    ("p50", "Gap p50", 70),
+    ("p90", "Gap p90", 70),
+    ("p99", "Gap p99", 70),
+    ("max", "Gap max", 70),
+)
+LEVEL_COLORS = {
+    "error": "#d62728",
+    "warning": "#ff7f0e",
+    "warn": "#ff7f0e",
+    "info": "#1f77b4",
+    "debug": "#7f7f7f",
+}
+
+
+def level_color(level):
+    return LEVEL_COLORS.get(level.lower(), "#9467bd")
+
+
+def level_rank(level):
+    # Most severe first; unknown levels go on top
+    order = list(LEVEL_COLORS)
+    level = level.lower()
+    return order.index(level) if level in order else len(order)
+
 
 class GUIComponents:
     def __init__(self, root):
@@ -9,6 +51,7 @@ class GUIComponents:
         self.control_frame = None
         self.display_frame = None
         self.log_tree = None
+        self.log_table = None
         self.saved_messages_listbox = tk.Listbox(root)
         self.start_time_slider = None
         self.end_time_slider = None
@@ -16,15 +59,58 @@ class GUIComponents:
         self.end_time_display = None
         self.log_level_vars = {}
         self.module_vars = {}
-
-    def create_menu(self, open_callback):
+        self.source_vars = {}
+        self.progress_frame = None
+        self.histogram_canvas = None
+        self.follow_var = tk.BooleanVar(value=False)
+        self.listen_var = tk.BooleanVar(value=False)
+        self.overlay_var = tk.BooleanVar(value=False)
+        self.profile_var = tk.BooleanVar(value=False)
+        self.overlay_label = None
+        self.stats_window = None
+        self.template_frame = None
+        self.template_tree = None
+        self.template_ids = {}  # template tree item -> template id
+        self.template_counts = {}  # template tree item -> rows in the group
+        self.template_messages = None  # the store the tree was filled from
+        self.templates_reversed = False
+        self.expand_template = None
+
+    def create_menu(
+        self, open_callback, follow_callback, export_callback, listen_callback
+    ):
         file_menu = tk.Menu(self.menu, tearoff=False)
         self.menu.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Open Log File", command=open_callback)
+        file_menu.add_command(label="Export Filtered View...", command=export_callback)
+        file_menu.add_checkbutton(
+            label="Follow File", variable=self.follow_var, command=follow_callback
+        )
+        file_menu.add_checkbutton(
+            label="Listen for Log Streams...",
+            variable=self.listen_var,
+            command=listen_callback,
+        )
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         self.root.config(menu=self.menu)
 
+    def create_view_menu(self, overlay_callback, profile_callback, stats_callback):
+        view_menu = tk.Menu(self.menu, tearoff=False)
+        self.menu.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Module Statistics...", command=stats_callback)
+        view_menu.add_separator()
+        view_menu.add_checkbutton(
+            label="Performance Overlay",
+            variable=self.overlay_var,
+            command=overlay_callback,
+        )
+        view_menu.add_checkbutton(
+            label="Profile (cProfile + tracemalloc)",
+            variable=self.profile_var,
+            command=profile_callback,
+        )
+
     def create_frames(self):
         self.control_frame = tk.Frame(self.root)
         self.control_frame.pack(side=tk.LEFT, fill=tk.Y)
@@ -32,8 +118,8 @@ class GUIComponents:
         self.display_frame = tk.Frame(self.root)
         self.display_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
-    def create_log_display(self, display_callback):
-        columns = ("timestamp", "level", "module", "message")
+    def create_log_display(self, select_callback):
+        columns = ("timestamp", "level", "module", "message", "source")
         self.log_tree = ttk.Treeview(
             self.display_frame, columns=columns, show="headings"
         )
@@ -43,14 +129,17 @@ class GUIComponents:
         for col in columns:
             self.log_tree.heading(col, text=col.capitalize())
 
-        # Add scrollbars
-        scrollbar_y = tk.Scrollbar(
-            self.display_frame, orient=tk.VERTICAL, command=self.log_tree.yview
+        # Add scrollbars; the vertical one spans every filtered row, not just
+        # the rendered window, and is driven by the virtual table
+        scrollbar_y = self.log_scrollbar_y = tk.Scrollbar(
+            self.display_frame, orient=tk.VERTICAL
         )
         scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
-        self.log_tree.config(yscrollcommand=scrollbar_y.set)
+        self.log_table = VirtualLogTable(
+            self.log_tree, scrollbar_y, self.format_timestamp
+        )
 
-        scrollbar_x = tk.Scrollbar(
+        scrollbar_x = self.log_scrollbar_x = tk.Scrollbar(
             self.display_frame, orient=tk.HORIZONTAL, command=self.log_tree.xview
         )
         scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
@@ -60,7 +149,64 @@ class GUIComponents:
         # self.log_tree.column("level", width=80, anchor="center", stretch=False)
         # self.log_tree.column("module", width=150, anchor="center", stretch=False)
         # self.log_tree.column("message", width=400, anchor="w", stretch=False)
-        self.log_tree.bind("<<TreeviewSelect>>", display_callback)
+        self.log_tree.bind("<<TreeviewSelect>>", select_callback)
+
+    def create_search_bar(self, search_callback):
+        search_frame = tk.Frame(self.display_frame)
+        search_frame.pack(side=tk.TOP, fill=tk.X, before=self.log_tree)
+        tk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=(5, 0))
+
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_entry_background = self.search_entry.cget("background")
+
+        self.search_regex_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            search_frame,
+            text="Regex",
+            variable=self.search_regex_var,
+            command=search_callback,
+        ).pack(side=tk.LEFT, padx=(0, 5))
+
+        self.group_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            search_frame,
+            text="Group by template",
+            variable=self.group_var,
+            command=search_callback,
+        ).pack(side=tk.LEFT, padx=(0, 5))
+
+        # Numeric filters on TrajectoryGenerator payloads, e.g. "Duration > 1000"
+        tk.Label(search_frame, text="Payload:").pack(side=tk.LEFT)
+        self.payload_var = tk.StringVar()
+        self.payload_entry = tk.Entry(search_frame, textvariable=self.payload_var)
+        self.payload_entry.pack(side=tk.LEFT, padx=5)
+
+        # Search while typing, once the keyboard has been idle for a moment
+        pending = [None]
+
+        def on_key(event):
+            if pending[0] is not None:
+                self.root.after_cancel(pending[0])
+            pending[0] = self.root.after(SEARCH_DELAY_MS, run)
+
+        def run():
+            pending[0] = None
+            search_callback()
+
+        self.search_entry.bind("<KeyRelease>", on_key)
+        self.payload_entry.bind("<KeyRelease>", on_key)
+
+    def mark_search_invalid(self, invalid):
+        self.search_entry.config(
+            background="#f8d0d0" if invalid else self.search_entry_background
+        )
+
+    def mark_payload_invalid(self, invalid):
+        self.payload_entry.config(
+            background="#f8d0d0" if invalid else self.search_entry_background
+        )
 
     def create_controls(self, update_display_callback):
         # Log Levels Label
@@ -84,6 +230,11 @@ class GUIComponents:
         # Placeholder for module checkboxes (set dynamically)
         self.module_vars = {}
 
+        # Source file checkboxes, only filled for merged logs
+        self.source_frame = tk.Frame(self.control_frame)
+        self.source_frame.pack(fill=tk.X, pady=(0, 10))
+        self.source_vars = {}
+
         # Saved Messages Section
         saved_messages_label = tk.Label(self.control_frame, text="Saved Messages")
         saved_messages_label.pack(pady=(10, 0))
@@ -98,6 +249,16 @@ class GUIComponents:
         time_filter_label = tk.Label(self.control_frame, text="Time Filter")
         time_filter_label.pack()
 
+        self.histogram_canvas = tk.Canvas(
+            self.control_frame,
+            width=HISTOGRAM_WIDTH,
+            height=HISTOGRAM_HEIGHT,
+            background="white",
+            highlightthickness=0,
+        )
+        self.histogram_canvas.pack(pady=(0, 5))
+        self.histogram_drag_start = None
+
         self.start_time_label = tk.Label(self.control_frame, text="Start Time:")
         self.start_time_label.pack()
 
@@ -106,8 +267,8 @@ class GUIComponents:
             from_=0,
             to=1000,
             orient=tk.HORIZONTAL,
-            length=200,
             showvalue=False,
+            length=HISTOGRAM_WIDTH,
             command=update_start_time,
         )
         self.start_time_slider.pack()
@@ -123,8 +284,8 @@ class GUIComponents:
             from_=0,
             to=1000,
             orient=tk.HORIZONTAL,
-            length=200,
             showvalue=False,
+            length=HISTOGRAM_WIDTH,
             command=update_end_time,
         )
         self.end_time_slider.pack()
@@ -132,14 +293,110 @@ class GUIComponents:
         self.end_time_display = tk.Label(self.control_frame, text="")
         self.end_time_display.pack()
 
-    def update_log_levels(self, log_levels, update_callback):
-        # Clear existing log level checkboxes
-        for widget in self.control_frame.pack_slaves():
-            if hasattr(widget, "is_log_level"):  # Custom attribute to identify log level widgets
+    def clear_filters(self):
+        for frame in (self.log_level_frame, self.module_frame, self.source_frame):
+            for widget in frame.pack_slaves():
                 widget.destroy()
+        self.log_level_vars = {}
+        self.module_vars = {}
+        self.source_vars = {}
 
-        # Add new log level checkboxes
-        for level in sorted(log_levels):
+    def bind_time_histogram(self, select_callback):
+        """
+        Clicking the histogram selects the bucket under the cursor; dragging
+        selects the dragged span. The callback gets start and end fractions
+        of the full time range.
+        """
+
+        def press(event):
+            self.histogram_drag_start = event.x
+
+        def drag(event):
+            if self.histogram_drag_start is None:
+                return
+            self.histogram_canvas.delete("drag")
+            self.histogram_canvas.create_rectangle(
+                self.histogram_drag_start,
+                0,
+                event.x,
+                HISTOGRAM_HEIGHT,
+                outline="black",
+                tags="drag",
+            )
+
+        def release(event):
+            if self.histogram_drag_start is None:
+                return
+            self.histogram_canvas.delete("drag")
+            low, high = sorted((self.histogram_drag_start, event.x))
+            self.histogram_drag_start = None
+            if high - low < 3:
+                select_callback(event.x / HISTOGRAM_WIDTH, None)
+            else:
+                select_callback(low / HISTOGRAM_WIDTH, high / HISTOGRAM_WIDTH)
+
+        self.histogram_canvas.bind("<ButtonPress-1>", press)
+        self.histogram_canvas.bind("<B1-Motion>", drag)
+        self.histogram_canvas.bind("<ButtonRelease-1>", release)
+
+    def draw_time_histogram(
+        self, histogram, levels, min_time, max_time, start_time, end_time
+    ):
+        canvas = self.histogram_canvas
+        if canvas is None or histogram.bins is None:
+            return
+        canvas.delete("bar", "window")
+        low, width, counts = histogram.bins
+        span = max_time - min_time or 1
+        scale = HISTOGRAM_WIDTH / span
+        totals = [sum(column) for column in zip(*counts)] if counts else []
+        peak = max(totals, default=0) or 1
+
+        # Stack the levels of each bucket, most severe at the bottom
+        order = sorted(range(len(counts)), key=lambda code: level_rank(levels[code]))
+        for bucket, total in enumerate(totals):
+            if not total:
+                continue
+            x0 = (low + bucket * width - min_time) * scale
+            x1 = max(x0 + 1, (low + (bucket + 1) * width - min_time) * scale)
+            y = HISTOGRAM_HEIGHT
+            for code in order:
+                count = counts[code][bucket]
+                if not count:
+                    continue
+                height = count / peak * HISTOGRAM_HEIGHT
+                canvas.create_rectangle(
+                    x0,
+                    y - height,
+                    x1,
+                    y,
+                    fill=level_color(levels[code]),
+                    width=0,
+                    tags="bar",
+                )
+                y -= height
+
+        # Shade what the sliders currently leave out
+        for x0, x1 in (
+            (0, (start_time - min_time) * scale),
+            ((end_time - min_time) * scale, HISTOGRAM_WIDTH),
+        ):
+            if x1 > x0:
+                canvas.create_rectangle(
+                    x0,
+                    0,
+                    x1,
+                    HISTOGRAM_HEIGHT,
+                    fill="gray",
+                    stipple="gray50",
+                    width=0,
+                    tags="window",
+                )
+
+    def update_log_levels(self, log_levels, update_callback):
+        # Add checkboxes for levels not seen yet, keeping existing selections
+        new_levels = [level for level in log_levels if level not in self.log_level_vars]
+        for level in new_levels:
             var = tk.BooleanVar(value=True)
             cb = tk.Checkbutton(
                 self.log_level_frame,
@@ -148,8 +405,10 @@ class GUIComponents:
                 command=update_callback,
             )
             cb.is_log_level = True  # Mark this widget as a log level widget
-            cb.pack(anchor="w")
+            cb.value = level
             self.log_level_vars[level] = var
+        if new_levels:
+            self._repack_sorted(self.log_level_frame)
 
     def update_start_time_display(self, timestamp):
         formatted_time = self.format_timestamp(timestamp)
@@ -160,13 +419,9 @@ class GUIComponents:
         self.end_time_display.config(text=formatted_time)
 
     def update_modules(self, modules, update_callback):
-        # Clear existing module checkboxes
-        for widget in self.control_frame.pack_slaves():
-            if hasattr(widget, "is_module"):  # Custom attribute to identify module widgets
-                widget.destroy()
-
-        # Add new module checkboxes
-        for module in sorted(modules):
+        # Add checkboxes for modules not seen yet, keeping existing selections
+        new_modules = [module for module in modules if module not in self.module_vars]
+        for module in new_modules:
             var = tk.BooleanVar(value=False)
             cb = tk.Checkbutton(
                 self.module_frame,
@@ -175,8 +430,181 @@ class GUIComponents:
                 command=update_callback,
             )
             cb.is_module = True  # Mark this widget as a module widget
-            cb.pack(anchor="w")
+            cb.value = module
             self.module_vars[module] = var
+        if new_modules:
+            self._repack_sorted(self.module_frame)
+
+    def update_sources(self, sources, update_callback):
+        # Sources are known before the first row, in the order they were given
+        if len(sources) < 2 or self.source_vars:
+            return
+        tk.Label(self.source_frame, text="Sources").pack()
+        for source in sources:
+            var = tk.BooleanVar(value=True)
+            tk.Checkbutton(
+                self.source_frame,
+                text=os.path.basename(source),
+                variable=var,
+                command=update_callback,
+            ).pack(anchor="w")
+            self.source_vars[source] = var
+
+    def update_filter_counts(self, level_counts, module_counts):
+        # Show how many rows of the time window each checkbox stands for
+        for frame, counts in (
+            (self.log_level_frame, level_counts),
+            (self.module_frame, module_counts),
+        ):
+            for cb in frame.winfo_children():
+                text = f"{cb.value} ({counts.get(cb.value, 0):,})"
+                if cb.cget("text") != text:
+                    cb.config(text=text)
+
+    def _repack_sorted(self, frame):
+        checkbuttons = sorted(frame.winfo_children(), key=lambda widget: widget.value)
+        for cb in checkbuttons:
+            cb.pack_forget()
+        for cb in checkbuttons:
+            cb.pack(anchor="w")
+
+    def create_progress_bar(self):
+        self.progress_frame = tk.Frame(self.display_frame)
+        self.progress_bar = ttk.Progressbar(
+            self.progress_frame, orient=tk.HORIZONTAL, mode="determinate", maximum=1000
+        )
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.progress_label = tk.Label(self.progress_frame, text="")
+        self.progress_label.pack(side=tk.RIGHT, padx=5)
+
+    def show_progress(self, rows, done, total, action="Loading"):
+        if not self.progress_frame.winfo_ismapped():
+            self.progress_frame.pack(side=tk.BOTTOM, fill=tk.X, before=self.log_tree)
+        self.progress_bar["value"] = 1000 * done / total if total else 0
+        self.progress_label.config(text=f"{action}... {rows} messages")
+
+    def hide_progress(self):
+        self.progress_frame.pack_forget()
+
+    def show_stats_window(self, refresh_callback):
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            return
+        window = self.stats_window = tk.Toplevel(self.root)
+        window.title("Module Statistics")
+
+        def close():
+            self.stats_window = None
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+
+        options = tk.Frame(window)
+        options.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        tk.Label(options, text="Bucket (s):").pack(side=tk.LEFT)
+        self.stats_bucket_var = tk.DoubleVar(value=1.0)
+        tk.Spinbox(
+            options,
+            from_=0.01,
+            to=3600,
+            increment=1,
+            width=8,
+            textvariable=self.stats_bucket_var,
+            command=refresh_callback,
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        tk.Label(options, text="Top:").pack(side=tk.LEFT)
+        self.stats_top_var = tk.IntVar(value=10)
+        tk.Spinbox(
+            options,
+            from_=1,
+            to=100,
+            width=4,
+            textvariable=self.stats_top_var,
+            command=refresh_callback,
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        tk.Button(options, text="Refresh", command=refresh_callback).pack(side=tk.LEFT)
+        self.stats_label = tk.Label(options, text="")
+        self.stats_label.pack(side=tk.LEFT, padx=10)
+
+        self.rate_canvas = tk.Canvas(
+            window,
+            width=RATE_CHART_WIDTH,
+            height=RATE_CHART_HEIGHT,
+            background="white",
+            highlightthickness=0,
+        )
+        self.rate_canvas.pack(side=tk.TOP, fill=tk.X, padx=5)
+
+        self.stats_tree = ttk.Treeview(
+            window, columns=[name for name, _, _ in STATS_COLUMNS], show="headings"
+        )
+        for name, heading, width in STATS_COLUMNS:
+            self.stats_tree.heading(name, text=heading)
+            anchor = "w" if name == "module" else "e"
+            self.stats_tree.column(name, width=width, anchor=anchor)
+        self.stats_tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def update_stats_window(self, bucket_seconds, entries):
+        if self.stats_window is None:
+            return
+        self.stats_label.config(text=f"{bucket_seconds:.3g} s buckets")
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for entry in entries:
+            intervals = entry["intervals"]
+            gaps = [
+                f"{intervals[key]:.3f}" if key in intervals else ""
+                for key in (50, 90, 99, "max")
+            ]
+            self.stats_tree.insert(
+                "",
+                tk.END,
+                values=(
+                    entry["module"],
+                    entry["total"],
+                    f"{entry['rate']:.1f}",
+                    f"{entry['peak_rate']:.1f}",
+                    self.format_timestamp(entry["peak_time"]),
+                    entry["levels"].get("error", 0),
+                    entry["levels"].get("warning", 0),
+                    *gaps,
+                ),
+            )
+
+        # One rate line per module, sharing the vertical scale
+        canvas = self.rate_canvas
+        canvas.delete("all")
+        peak = max((entry["peak_rate"] for entry in entries), default=0) or 1
+        for index, entry in enumerate(entries[: len(RATE_COLORS)]):
+            rates = entry["rates"]
+            step = RATE_CHART_WIDTH / max(len(rates) - 1, 1)
+            points = []
+            for bucket, rate in enumerate(rates):
+                points.extend(
+                    (bucket * step, RATE_CHART_HEIGHT - rate / peak * RATE_CHART_HEIGHT)
+                )
+            color = RATE_COLORS[index]
+            if len(points) >= 4:
+                canvas.create_line(*points, fill=color)
+            canvas.create_text(
+                5, 5 + 12 * index, text=entry["module"], fill=color, anchor="nw"
+            )
+
+    def show_overlay(self, text):
+        # Floats over the top right corner of the log view
+        if self.overlay_label is None:
+            self.overlay_label = tk.Label(
+                self.display_frame,
+                justify=tk.LEFT,
+                anchor="w",
+                bg="lightyellow",
+                font=("TkFixedFont", 8),
+            )
+        self.overlay_label.config(text=text)
+        self.overlay_label.place(relx=1.0, rely=0.0, anchor="ne")
+
+    def hide_overlay(self):
+        if self.overlay_label is not None:
+            self.overlay_label.place_forget()
 
     def show_context_menu(self, event, copy_callback, save_callback):
         # Create context menu if not already created
@@ -189,31 +617,139 @@ class GUIComponents:
         finally:
             self.popup_menu.grab_release()
 
-    def select_message_in_log_tree(self, message_id):
-        # Iterate over log tree items to find the message
-        for item in self.log_tree.get_children():
-            item_tags = self.log_tree.item(item, "tags")
-            if message_id in item_tags:
-                self.log_tree.selection_set(item)
-                self.log_tree.see(item)
-                break
-
-    def populate_log_tree(self, messages):
-        for item in self.log_tree.get_children():
-            self.log_tree.delete(item)
-
-        for msg in messages:
-            formatted_timestamp = self.format_timestamp(msg["timestamp"])
-            self.log_tree.insert(
-                "",
+    def select_message_in_log_tree(self, row):
+        return self.log_table.select_row(row)
+
+    def populate_log_tree(self, messages, rows):
+        self.log_table.set_rows(messages, rows)
+
+    def create_template_view(self, expand_callback, activate_callback):
+        """
+        A tree with one item per template, shown instead of the log table
+        in grouped mode. Templates expand on demand: `expand_callback(id,
+        limit)` returns (rows, total) for the group, and double-clicking a
+        row calls `activate_callback(row)`.
+        """
+        self.template_frame = tk.Frame(self.display_frame)
+        columns = ("count", "first", "last", "template")
+        tree = self.template_tree = ttk.Treeview(
+            self.template_frame, columns=columns, show="tree headings"
+        )
+        tree.column("#0", width=30, stretch=False)
+        tree.column("count", width=80, anchor="e", stretch=False)
+        tree.column("first", width=100, stretch=False)
+        tree.column("last", width=100, stretch=False)
+        for col in columns:
+            tree.heading(col, text=col.capitalize())
+        # Clicking Count flips between most and least frequent first
+        tree.heading("count", command=self._reverse_templates)
+        scrollbar = tk.Scrollbar(
+            self.template_frame, orient=tk.VERTICAL, command=tree.yview
+        )
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.config(yscrollcommand=scrollbar.set)
+        tree.pack(fill=tk.BOTH, expand=True)
+        self.expand_template = expand_callback
+
+        def on_open(event):
+            item = tree.focus()
+            if item + "-" in tree.get_children(item):
+                self._list_template_rows(item)  # rows are only listed once
+
+        def on_double_click(event):
+            item = tree.identify_row(event.y)
+            if "-r" in item:
+                activate_callback(int(item.rsplit("-r", 1)[1]))
+
+        tree.bind("<<TreeviewOpen>>", on_open)
+        tree.bind("<Double-1>", on_double_click)
+
+    def show_template_groups(self, messages, groups):
+        """
+        Show (template id, text, count, first time, last time) groups in
+        place of the log table. The tree is updated in place, so expanded
+        templates stay open; their rows are listed again when they change.
+        """
+        if not self.template_frame.winfo_ismapped():
+            for widget in (self.log_tree, self.log_scrollbar_y, self.log_scrollbar_x):
+                widget.pack_forget()
+            self.template_frame.pack(fill=tk.BOTH, expand=True)
+        tree = self.template_tree
+        if messages is not self.template_messages:
+            tree.delete(*tree.get_children())
+            self.template_ids, self.template_counts = {}, {}
+            self.template_messages = messages
+        items = []
+        for template_id, text, count, first_time, last_time in groups:
+            item = "tnone" if template_id is None else f"t{template_id}"
+            items.append(item)
+            values = (
+                count,
+                self.format_timestamp(first_time),
+                self.format_timestamp(last_time),
+                text,
+            )
+            if not tree.exists(item):
+                tree.insert("", tk.END, iid=item, values=values)
+                tree.insert(item, tk.END, iid=item + "-")  # expander placeholder
+            elif self.template_counts.get(item) != count:
+                tree.item(item, values=values)
+                if tree.item(item, "open"):
+                    self._list_template_rows(item)
+                else:
+                    # List the rows afresh the next time it is opened
+                    tree.delete(*tree.get_children(item))
+                    tree.insert(item, tk.END, iid=item + "-")
+            else:
+                tree.item(item, values=values)  # the template text may widen
+            self.template_ids[item] = template_id
+            self.template_counts[item] = count
+
+        shown = set(items)
+        gone = [item for item in tree.get_children() if item not in shown]
+        if gone:
+            tree.delete(*gone)
+            for item in gone:
+                del self.template_ids[item], self.template_counts[item]
+        if self.templates_reversed:
+            items.reverse()
+        tree.set_children("", *items)
+
+    def _list_template_rows(self, item):
+        # (Re)list the rows under an expanded template
+        tree = self.template_tree
+        tree.delete(*tree.get_children(item))
+        rows, total = self.expand_template(self.template_ids[item], TEMPLATE_ROWS_SHOWN)
+        messages = self.log_table.messages
+        for row in rows:
+            tree.insert(
+                item,
                 tk.END,
+                iid=f"{item}-r{row}",
                 values=(
-                    formatted_timestamp,
-                    msg["level"],
-                    msg["module"],
-                    msg["message"],
+                    "",
+                    self.format_timestamp(messages.timestamps[row]),
+                    "",
+                    messages.get_message(row),
                 ),
             )
+        if total > len(rows):
+            tree.insert(
+                item, tk.END, values=("", "", "", f"... {total - len(rows)} more")
+            )
+
+    def hide_template_groups(self):
+        if self.template_frame is None or not self.template_frame.winfo_ismapped():
+            return
+        self.template_frame.pack_forget()
+        self.log_tree.pack(fill=tk.BOTH, expand=True)
+        self.log_scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def _reverse_templates(self):
+        self.templates_reversed = not self.templates_reversed
+        tree = self.template_tree
+        tree.set_children("", *reversed(tree.get_children()))
 
     def update_time_sliders(self, min_time, max_time):
         """
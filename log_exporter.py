@@ -0,0 +1,239 @@
+import csv
+import json
+import os
+import queue
+import threading
+from itertools import islice
+
+EXPORT_FORMATS = {
+    ".jsonl": "jsonl",
+    ".json": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+}
+FIELDS = ("id", "timestamp", "level", "module", "message", "source")
+BATCH_ROWS = 10000  # rows held in memory at a time
+
+
+def format_for_path(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format for {path!r}")
+    return EXPORT_FORMATS[extension]
+
+
+def iter_store_entries(messages, rows, source=""):
+    """
+    Yield the given rows of a MessageStore as export entries. Bodies of a
+    mapped store are sliced from the file one row at a time, so nothing
+    beyond the current row is decoded.
+    """
+    for row in rows:
+        yield {
+            "id": messages.ids[row],
+            "timestamp": messages.timestamps[row],
+            "level": messages.get_level(row),
+            "module": messages.get_module(row),
+            "message": messages.get_message(row),
+            "source": messages.get_source(row) or source,
+        }
+
+
+def export_entries(entries, path, file_format=None, progress=None, cancel_event=None):
+    """
+    Write entries (dicts with the FIELDS keys, e.g. from log_query.iter_entries
+    or iter_store_entries) to `path` as JSONL, CSV, Parquet or Arrow and
+    return how many were written.
+
+    Entries are consumed BATCH_ROWS at a time, so memory stays bounded
+    whatever the row count. The file is written under a temporary name and
+    only moved into place once complete; a cancelled export leaves nothing
+    behind and returns None. `progress(rows)` is called after each batch.
+    """
+    file_format = file_format or format_for_path(path)
+    writer = _WRITERS[file_format]
+    part_path = path + ".part"
+    written = 0
+    entries = iter(entries)
+    try:
+        with writer(part_path) as write_batch:
+            while True:
+                batch = list(islice(entries, BATCH_ROWS))
+                if not batch:
+                    break
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                write_batch(batch)
+                written += len(batch)
+                if progress is not None:
+                    progress(written)
+        if cancel_event is not None and cancel_event.is_set():
+            os.remove(part_path)
+            return None
+        os.replace(part_path, path)
+        return written
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+
+def export_rows(messages, rows, path, file_format=None, source=""):
+    """
+    Headless export of the rows of a store, e.g. those LogIndexes.select()
+    returned for the current filters.
+    """
+    return export_entries(iter_store_entries(messages, rows, source), path, file_format)
+
+
+class _JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8", newline="\n")
+
+    def __enter__(self):
+        return self.write_batch
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+        return False
+
+    def write_batch(self, batch):
+        self.file.write(
+            "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch)
+        )
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, FIELDS)
+        self.writer.writeheader()
+
+    def __enter__(self):
+        return self.writer.writerows
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+        return False
+
+
+class _ArrowWriter:
+    # Parquet and Arrow IPC files; one row group / record batch per batch
+    def __init__(self, path, parquet=True):
+        pyarrow = _pyarrow()
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema(
+            [
+                ("id", pyarrow.int64()),
+                ("timestamp", pyarrow.float64()),
+                ("level", pyarrow.string()),
+                ("module", pyarrow.string()),
+                ("message", pyarrow.string()),
+                ("source", pyarrow.string()),
+            ]
+        )
+        if parquet:
+            import pyarrow.parquet
+
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        else:
+            import pyarrow.ipc
+
+            self.writer = pyarrow.ipc.new_file(path, self.schema)
+
+    def __enter__(self):
+        return self.write_batch
+
+    def __exit__(self, *exc_info):
+        self.writer.close()
+        return False
+
+    def write_batch(self, batch):
+        table = self.pyarrow.Table.from_pylist(batch, schema=self.schema)
+        self.writer.write_table(table)
+
+
+def _pyarrow():
+    # Optional dependency, only imported for Parquet and Arrow exports
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow exports need the pyarrow package")
+    return pyarrow
+
+
+_WRITERS = {
+    "jsonl": _JsonlWriter,
+    "csv": _CsvWriter,
+    "parquet": _ArrowWriter,
+    "arrow": lambda path: _ArrowWriter(path, parquet=False),
+}
+
+
+class LogExporter:
+    """
+    Run export_entries on a worker thread so a long export does not block
+    the UI, which drains events with poll() like it does for LogLoader.
+
+    Events are tuples:
+        ("progress", rows_written, rows_total)
+        ("done", rows_written, path)
+        ("error", message)
+    """
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.running = False
+        self._cancel_event = None
+        self._thread = None
+
+    def start(self, messages, rows, path, source=""):
+        self.cancel()
+        self._cancel_event = threading.Event()
+        self.running = True
+        self._thread = threading.Thread(
+            target=self._export,
+            args=(messages, rows, path, source, self._cancel_event),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def cancel(self):
+        # Returns the export thread if it is still running; it stops (and
+        # removes its .part file) after the current batch
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        self.running = False
+        if self._thread is not None and self._thread.is_alive():
+            return [self._thread]
+        return []
+
+    def poll(self):
+        events = []
+        while True:
+            try:
+                cancel_event, event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if cancel_event is self._cancel_event and not cancel_event.is_set():
+                events.append(event)
+                if event[0] != "progress":
+                    self.running = False
+
+    def _export(self, messages, rows, path, source, cancel_event):
+        def emit(*event):
+            self.events.put((cancel_event, event))
+
+        try:
+            written = export_entries(
+                iter_store_entries(messages, rows, source),
+                path,
+                progress=lambda done: emit("progress", done, len(rows)),
+                cancel_event=cancel_event,
+            )
+            if written is not None:
+                emit("done", written, path)
+        except Exception as e:
+            print(f"Failed to export log rows: {e}")  # Print error to terminal
+            emit("error", str(e))
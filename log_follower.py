@@ -0,0 +1,95 @@
+import os
+
+COUNT_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+class LogFollower:
+    """
+    Pick up bytes appended to a log after it was loaded.
+
+    The follower remembers how far the store's mapping reaches and whether
+    it stopped in the middle of a line. Each poll() costs one stat() when
+    nothing changed; otherwise the file is remapped and only complete new
+    lines are indexed, continuing the line numbering and letting
+    continuation lines extend the newest entry. A half-written last line
+    waits for its newline.
+
+    poll() returns None when nothing changed, "reset" when the file was
+    truncated or replaced (rotation) and needs a full reload, or the number
+    of bytes consumed.
+    """
+
+    def __init__(self, log_parser, messages, file_path):
+        self.log_parser = log_parser
+        self.messages = messages
+        self.file_path = file_path
+        stat = os.stat(file_path)
+        self.file_id = (stat.st_dev, stat.st_ino)
+
+        buffer = messages.mapped_source
+        self.offset = len(buffer) if buffer is not None else 0
+        # An unmapped store was read whole; only a change after this counts
+        self.size_seen = self.offset if buffer is not None else stat.st_size
+        # The loader counted an unterminated last line as a line already
+        self.partial_line = buffer is not None and buffer[-1:] != b"\n"
+        self.next_line = self._count_lines(buffer)
+
+    def poll(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None  # rotated away; wait for the new file to appear
+        if (stat.st_dev, stat.st_ino) != self.file_id or stat.st_size < self.offset:
+            return "reset"
+        if stat.st_size == self.size_seen:
+            return None
+        self.size_seen = stat.st_size
+        if self.messages.mapped_source is None:
+            return "reset"  # the file was empty when loaded, nothing is mapped
+
+        buffer = self.log_parser.map_file(self.file_path)
+        self.messages.replace_mapping(buffer)
+        start = self.offset
+
+        if self.partial_line:
+            # Finish the line the previous read stopped in
+            newline = buffer.find(b"\n", self.offset)
+            if newline == -1:
+                return None
+            line_start = buffer.rfind(b"\n", 0, self.offset) + 1
+            last_span = self.messages.last_span()
+            if last_span is not None and last_span[0] >= line_start:
+                # The partial line already opened an entry; it just grows
+                self.messages.extend_last_span(newline + 1)
+                self.offset = newline + 1
+            else:
+                # It was read as a continuation, but the complete line may
+                # turn out to be an entry header, so index it again
+                if last_span is not None and last_span[1] > line_start:
+                    self.messages.extend_last_span(line_start)
+                self.offset = line_start
+                self.next_line -= 1
+            self.partial_line = False
+
+        complete = buffer.rfind(b"\n", self.offset) + 1
+        if complete > self.offset:
+            lines, _ = self.log_parser.index_range(
+                buffer, self.messages, self.offset, complete, first_line=self.next_line
+            )
+            self.next_line += lines
+            self.offset = complete
+        return (self.offset - start) or None
+
+    def _count_lines(self, buffer):
+        if buffer is None:
+            return 0
+        last_span = self.messages.last_span()
+        if last_span is not None:
+            # Every line after the newest entry's header continues it, so
+            # only its span needs counting, not the whole mapping
+            tail = buffer[last_span[0] :].count(b"\n")
+            return self.messages.ids[-1] + tail + (1 if self.partial_line else 0)
+        lines = 0
+        for start in range(0, len(buffer), COUNT_CHUNK_BYTES):
+            lines += buffer[start : start + COUNT_CHUNK_BYTES].count(b"\n")
+        return lines + (1 if self.partial_line else 0)
@@ -0,0 +1,83 @@
+import threading
+
+from filter_index import FilterIndex
+from log_stats import RateIndex
+from payload_index import PayloadIndex
+from search_index import TrigramIndex
+from template_miner import TemplateIndex
+from time_histogram import TimeHistogram
+from time_index import TimeIndex
+
+
+class LogIndexes:
+    """
+    The indexes kept alongside a MessageStore. All but the search index are
+    extended together as rows are appended.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.filter_index = FilterIndex(messages)
+        self.time_index = TimeIndex(messages)
+        self.histogram = TimeHistogram(messages)
+        self.rate_index = RateIndex(messages)
+        # Built lazily in the background once loading finishes
+        self.search_index = TrigramIndex(messages)
+        # Mined in the background once loading finishes
+        self.template_index = TemplateIndex(messages)
+        # Filled on the first payload filter
+        self.payload_index = PayloadIndex(messages, self.filter_index)
+
+    def cancel(self):
+        """
+        Stop the background workers and return the threads that are still
+        reading the store; it must stay open until they have ended.
+        """
+        return (
+            self.search_index.cancel()
+            + self.template_index.cancel()
+            + self.payload_index.cancel()
+        )
+
+    def extend(self, row_end=None):
+        self.filter_index.extend(row_end)
+        self.time_index.extend(row_end)
+        self.histogram.extend(row_end)
+        self.rate_index.extend(row_end)
+
+    def select(
+        self,
+        level_codes,
+        module_codes,
+        start_time,
+        end_time,
+        row_limit,
+        source_codes=None,
+        payload_conditions=None,
+    ):
+        window = self.time_index.window(start_time, end_time, row_limit)
+        rows = self.filter_index.select(
+            level_codes, module_codes, row_limit, window, source_codes
+        )
+        if payload_conditions:
+            rows = self.payload_index.select(payload_conditions, rows)
+        return rows
+
+    def counts(self, start_time, end_time, row_limit):
+        # Rows per level and module code inside the time window
+        window = self.time_index.window(start_time, end_time, row_limit)
+        return self.filter_index.counts(row_limit, window)
+
+
+def close_store(messages, threads):
+    """
+    Close `messages` once the worker `threads` reading it have ended. The
+    wait happens on a thread of its own, so the caller never blocks.
+    """
+
+    def close():
+        for thread in threads:
+            thread.join()
+        messages.close()
+
+    threading.Thread(target=close, daemon=True).start()
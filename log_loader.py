@@ -0,0 +1,169 @@
+import queue
+import threading
+
+from log_indexes import LogIndexes, close_store
+from log_merger import LogMerger
+from message_store import MessageStore
+from perf_stats import PROFILER, STATS
+
+FIRST_BATCH_BYTES = 256 * 1024  # small first batch so the first rows show quickly
+BATCH_BYTES = 8 * 1024 * 1024
+FIRST_BATCH_ROWS = 2000  # the same for merged loads, counted in rows
+BATCH_ROWS = 100000
+
+
+class LogLoader:
+    """
+    Index log files on a worker thread.
+
+    The worker appends rows to a MessageStore in batches, extends its
+    LogIndexes after each one and reports through a queue that the UI
+    drains with poll() from a root.after loop. Rows below the count in the
+    latest progress event are complete and safe to read.
+    Starting a new load cancels the one in progress. Several files are
+    loaded as one timeline through a LogMerger.
+
+    Events are tuples:
+        ("started", messages, indexes)
+        ("progress", rows, bytes_done, bytes_total)
+        ("done", rows)
+        ("error", message)
+    """
+
+    def __init__(self, log_parser, parse_cache=None):
+        self.log_parser = log_parser
+        self.parse_cache = parse_cache
+        self.events = queue.Queue()
+        self._generation = 0
+        self._cancel_event = None
+
+    def start(self, file_path):
+        self._start(self._load, file_path)
+
+    def start_merged(self, file_paths):
+        self._start(self._load_merged, file_paths)
+
+    def _start(self, target, source):
+        self.cancel()
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=target,
+            args=(source, self._generation, self._cancel_event),
+            daemon=True,
+        )
+        thread.start()
+
+    def cancel(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def poll(self):
+        """
+        Return the queued events of the current load, dropping any left over
+        from cancelled ones.
+        """
+        events = []
+        while True:
+            try:
+                generation, event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if generation == self._generation:
+                events.append(event)
+
+    def _load(self, file_path, generation, cancel_event):
+        def emit(*event):
+            self.events.put((generation, event))
+
+        messages = indexes = None
+        try:
+            if self.parse_cache is not None:
+                with STATS.span("cache load"):
+                    messages = self.parse_cache.load(file_path)
+            if messages is not None:
+                indexes = LogIndexes(messages)
+                emit("started", messages, indexes)
+                with STATS.span("index build", len(messages)):
+                    indexes.extend()
+                emit("done", len(messages))
+                return
+
+            buffer = self.log_parser.map_file(file_path)
+            if buffer is None:
+                messages = MessageStore()
+                emit("started", messages, LogIndexes(messages))
+                emit("done", 0)
+                return
+            messages = MessageStore(mapped_source=buffer)
+            indexes = LogIndexes(messages)
+            emit("started", messages, indexes)
+
+            size = len(buffer)
+            position = 0
+            line = 0
+            batch_bytes = FIRST_BATCH_BYTES
+            while position < size:
+                if cancel_event.is_set():
+                    return
+                # Batches end on a line boundary so no line is split
+                end = buffer.find(b"\n", position + batch_bytes)
+                end = size if end == -1 else end + 1
+                rows = len(messages)
+                with PROFILER.profile_thread():
+                    with STATS.span("parse") as span:
+                        lines, _ = self.log_parser.index_range(
+                            buffer, messages, position, end, first_line=line
+                        )
+                        span.add_rows(len(messages) - rows)
+                    with STATS.span("index build", len(messages) - rows):
+                        indexes.extend()
+                line += lines
+                position = end
+                batch_bytes = BATCH_BYTES
+                emit("progress", len(messages), position, size)
+
+            if self.parse_cache is not None and not cancel_event.is_set():
+                self.parse_cache.save(file_path, messages)
+            emit("done", len(messages))
+        except Exception as e:
+            print(f"Failed to load log file: {e}")  # Print error to terminal
+            emit("error", str(e))
+        finally:
+            if cancel_event.is_set() and messages is not None:
+                # Index workers may have been started on the rows so far
+                close_store(messages, indexes.cancel() if indexes else [])
+
+    def _load_merged(self, file_paths, generation, cancel_event):
+        def emit(*event):
+            self.events.put((generation, event))
+
+        messages = indexes = None
+        try:
+            merger = LogMerger(self.log_parser, file_paths)
+            messages = merger.messages
+            indexes = LogIndexes(messages)
+            emit("started", messages, indexes)
+
+            batch_rows = FIRST_BATCH_ROWS
+            while True:
+                with PROFILER.profile_thread():
+                    with STATS.span("merge") as span:
+                        rows = merger.read(batch_rows)
+                        span.add_rows(rows)
+                    if not rows or cancel_event.is_set():
+                        break
+                    with STATS.span("index build", rows):
+                        indexes.extend()
+                batch_rows = BATCH_ROWS
+                emit("progress", len(messages), merger.done, merger.total)
+            if cancel_event.is_set():
+                return
+            emit("done", len(messages))
+        except Exception as e:
+            print(f"Failed to merge log files: {e}")  # Print error to terminal
+            emit("error", str(e))
+        finally:
+            if cancel_event.is_set() and messages is not None:
+                # Index workers may have been started on the rows so far
+                close_store(messages, indexes.cancel() if indexes else [])
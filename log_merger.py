@@ -0,0 +1,76 @@
+import heapq
+from itertools import islice
+
+from message_store import MessageStore
+
+
+def merge_spans(log_parser, buffers):
+    """
+    Interleave the entries of several mapped logs by timestamp. Yields
+    (timestamp, source code, line id, level, module, body start, body end)
+    tuples, where the source code is the buffer's position in `buffers`.
+    """
+    return heapq.merge(
+        *(
+            _tagged(log_parser.iter_spans(buffer), code)
+            for code, buffer in enumerate(buffers)
+        )
+    )
+
+
+def _tagged(entries, code):
+    # The source code sits right after the timestamp so ties compare by
+    # file order and never reach the remaining fields
+    for timestamp, line_id, level, module, start, end in entries:
+        yield timestamp, code, line_id, level, module, start, end
+
+
+class LogMerger:
+    """
+    Merge several logs into one timeline.
+
+    Every file is mapped and read by its own entry stream; heapq.merge
+    interleaves the streams by timestamp, holding one pending entry per
+    file, so nothing is concatenated or re-sorted. Rows go into a single
+    store as header fields and body spans plus a source code naming their
+    file, so memory grows with the index rather than with the text.
+    Entries with equal timestamps keep the order the files were given in.
+    """
+
+    def __init__(self, log_parser, file_paths):
+        self.messages = MessageStore()
+        self.total = 0
+        buffers = []
+        for file_path in file_paths:
+            buffer = log_parser.map_file(file_path)
+            if buffer is None:
+                continue  # empty files add no rows
+            self.messages.add_source(file_path, buffer)
+            self.total += len(buffer)
+            buffers.append(buffer)
+        self._positions = [0] * len(buffers)
+        self._entries = merge_spans(log_parser, buffers)
+
+    @property
+    def done(self):
+        # Bytes consumed so far, summed over the files
+        return sum(self._positions)
+
+    def read(self, max_rows):
+        """
+        Append up to `max_rows` merged rows to the store and return how many
+        were appended; 0 once every file is exhausted.
+        """
+        messages = self.messages
+        append_span = messages.append_span
+        append_source = messages.source_codes.append
+        positions = self._positions
+        rows = 0
+        for timestamp, code, line_id, level, module, start, end in islice(
+            self._entries, max_rows
+        ):
+            append_span(line_id, timestamp, level, module, start, end)
+            append_source(code)
+            positions[code] = end
+            rows += 1
+        return rows
@@ -1,44 +1,47 @@
+import io
+import mmap
+import os
 import re
-from datetime import datetime
+from itertools import repeat
+
+from compressed_log import CompressedLog, is_compressed, open_text
+from message_store import MessageStore, join_continuation_lines
+from perf_stats import STATS
+from timestamp_decoder import TimestampDecoder
+
+ENTRY_PATTERN = re.compile(rb"\[(.*?)\]\[(.*?)\]\[(.*?)\] (.*)")
+DECODE_BATCH = 4096  # entries whose timestamps are decoded together
 
 
 class LogParser:
     def __init__(self):
         self.start_time = None
         self.end_time = None
+        self.timestamp_decoder = TimestampDecoder()
+
+    def parse(self, file_path, lazy=False, workers=1):
+        if workers != 1:
+            return self.parse_parallel(file_path, workers, lazy)
+        if lazy:
+            return self.parse_mapped(file_path)
 
-    def parse(self, file_path):
         pattern = re.compile(r"\[(.*?)\]\[(.*?)\]\[(.*?)\] (.*)")
-        messages = []
+        decode_timestamp = self.timestamp_decoder.decode
+        messages = MessageStore()
         try:
-            with open(file_path, "r") as file:
-                current_message = None
+            with open_text(file_path) as file, STATS.span("parse") as span:
                 for idx, line in enumerate(file):
                     match = pattern.match(line.strip())
                     if match:
-                        # If a new log entry starts, save the previous one
-                        if current_message:
-                                messages.append(current_message)
                         timestamp, level, module, message = match.groups()
-                        dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")
-                        current_message = {
-                            "id": idx,  # Unique ID for the message
-                            "timestamp": dt.timestamp(),
-                            # "timestamp_str": timestamp_str,  # Keep original string for display
-                            # "time_only_str": dt.strftime("%H:%M:%S.%f")[
-                            #     :-3
-                            # ],  # Time with milliseconds
-                            "level": level,
-                            "module": module,
-                            "message": message,
-                        }
+                        # The line number doubles as the unique ID for the message
+                        messages.append(
+                            idx, decode_timestamp(timestamp), level, module, message
+                        )
                     else:
-                        if current_message:
-                            current_message["message"] += " " + line
-
-                # append the last msg
-                if current_message:
-                    messages.append(current_message)
+                        # Continuation lines are glued onto the previous entry
+                        messages.extend_last_message(" " + line)
+                span.add_rows(len(messages))
                 return messages
 
             if not self.messages:
@@ -51,12 +54,244 @@ class LogParser:
             print(f"Failed to read log file: {e}")  # Print error to terminal
             # messagebox.showerror("Error", f"Failed to read log file: {e}")
 
+    def parse_mapped(self, file_path):
+        """
+        Index a log through a read-only memory map. Only the entry header
+        fields and the byte span of each body are kept; the store decodes
+        bodies from the mapping when a row is displayed or copied.
+        """
+        try:
+            buffer = self.map_file(file_path)
+            if buffer is None:
+                return MessageStore()
+            messages = MessageStore(mapped_source=buffer)
+            with STATS.span("parse") as span:
+                self.index_range(buffer, messages, 0, len(buffer))
+                span.add_rows(len(messages))
+            return messages
+        except Exception as e:
+            print(f"Failed to index log file: {e}")  # Print error to terminal
+
+    def parse_parallel(self, file_path, workers=None, lazy=False):
+        """
+        Split the file into byte ranges that start on entry lines and parse
+        them in a process pool. Chunks are merged in file order, with line
+        ids shifted by the line count of the chunks before them.
+        """
+        # Imported here so headless queries do not pay for multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = workers or os.cpu_count() or 1
+        if is_compressed(file_path):
+            # Workers would each have to decompress up to their chunk
+            return self.parse_mapped(file_path) if lazy else self.parse(file_path)
+        try:
+            buffer = self.map_file(file_path)
+            if buffer is None:
+                return MessageStore()
+            boundaries = self._chunk_boundaries(buffer, workers)
+            with ProcessPoolExecutor(max_workers=len(boundaries) - 1) as executor:
+                chunks = list(
+                    executor.map(
+                        _parse_chunk,
+                        repeat(file_path),
+                        boundaries[:-1],
+                        boundaries[1:],
+                        repeat(lazy),
+                    )
+                )
+
+            if lazy:
+                messages = MessageStore(mapped_source=buffer)
+            else:
+                buffer.close()
+                messages = MessageStore()
+            line_offset = 0
+            for chunk in chunks:
+                # Continuation lines at the head of a chunk belong to the last
+                # entry of the previous one
+                if lazy:
+                    messages.extend_last_span(chunk["orphan_end"])
+                elif chunk["orphan_text"]:
+                    messages.extend_last_message(chunk["orphan_text"])
+                messages.extend_columns(
+                    chunk["columns"], chunk["levels"], chunk["modules"], line_offset
+                )
+                line_offset += chunk["lines"]
+            return messages
+        except Exception as e:
+            print(f"Failed to parse log file in parallel: {e}")
+
+    def index_range(self, buffer, messages, start, end, first_line=0):
+        """
+        Index the entries on the lines starting in [start, end) of a mapped
+        log into `messages`, numbering lines from `first_line` at `start`.
+
+        Returns the number of lines read and the end offset of any
+        continuation lines found before the first entry. Entries are held
+        back in batches so their timestamps are decoded together.
+        """
+        names = {}  # raw level/module bytes -> decoded name
+        decode_many = self.timestamp_decoder.decode_many
+        batch = []  # [timestamp text, line id, level, module, start, end]
+        orphan_end = start
+        position = start
+        idx = first_line
+        buffer.seek(start)
+        readline = buffer.readline
+        while position < end:
+            line = readline()
+            if not line:
+                break
+            stripped = line.lstrip()
+            match = ENTRY_PATTERN.match(stripped.rstrip())
+            line_end = position + len(line)
+            if match:
+                timestamp, level, module, _ = match.groups()
+                for name in (level, module):
+                    if name not in names:
+                        names[name] = name.decode("utf-8", errors="replace")
+                body_start = line_end - len(stripped) + match.start(4)
+                if len(batch) >= DECODE_BATCH:
+                    _append_spans(messages, batch, decode_many)
+                batch.append(
+                    [timestamp, idx, names[level], names[module], body_start, line_end]
+                )
+            elif batch:
+                batch[-1][5] = line_end
+            elif len(messages):
+                messages.extend_last_span(line_end)
+            elif orphan_end == position:
+                orphan_end = line_end
+            position = line_end
+            idx += 1
+        _append_spans(messages, batch, decode_many)
+        return idx - first_line, orphan_end
+
+    def iter_spans(self, buffer):
+        """
+        Yield the entries of a mapped log one at a time, in file order, as
+        (timestamp, line id, level, module, body start, body end) tuples.
+
+        An entry is yielded once the next entry line (or the end of the
+        buffer) shows that no more continuation lines follow, so only one
+        entry is held at a time. Continuation lines before the first entry
+        have nothing to attach to and are skipped.
+        """
+        names = {}  # raw level/module bytes -> decoded name
+        decode_timestamp = self.timestamp_decoder.decode
+        pending = None
+        position = 0
+        idx = 0
+        buffer.seek(0)
+        readline = buffer.readline
+        while True:
+            line = readline()
+            if not line:
+                break
+            stripped = line.lstrip()
+            match = ENTRY_PATTERN.match(stripped.rstrip())
+            line_end = position + len(line)
+            if match:
+                if pending is not None:
+                    yield tuple(pending)
+                timestamp, level, module, _ = match.groups()
+                for name in (level, module):
+                    if name not in names:
+                        names[name] = name.decode("utf-8", errors="replace")
+                body_start = line_end - len(stripped) + match.start(4)
+                pending = [
+                    decode_timestamp(timestamp),
+                    idx,
+                    names[level],
+                    names[module],
+                    body_start,
+                    line_end,
+                ]
+            elif pending is not None:
+                pending[5] = line_end
+            position = line_end
+            idx += 1
+        if pending is not None:
+            yield tuple(pending)
+
+    def map_file(self, file_path):
+        if os.path.getsize(file_path) == 0:
+            return None  # empty files cannot be mapped
+        if is_compressed(file_path):
+            buffer = CompressedLog(file_path)
+            if not len(buffer):
+                buffer.close()
+                return None
+            return buffer
+        with open(file_path, "rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _chunk_boundaries(self, buffer, workers):
+        size = len(buffer)
+        boundaries = [0]
+        for i in range(1, workers):
+            newline = buffer.find(b"\n[", max(size * i // workers, boundaries[-1]) - 1)
+            if newline == -1:
+                break
+            if newline + 1 > boundaries[-1]:
+                boundaries.append(newline + 1)
+        boundaries.append(size)
+        return boundaries
+
     def get_time_range(self, messages):
-        timestamps = [msg["timestamp"] for msg in messages]
-        return min(timestamps), max(timestamps)
+        return messages.get_time_range()
 
     def set_start_time(self, start_time):
         self.start_time = start_time
 
     def set_end_time(self, end_time):
         self.end_time = end_time
+
+
+def _append_spans(messages, batch, decode_many):
+    # Append the held-back entries of index_range() and empty the batch
+    timestamps = decode_many([entry[0] for entry in batch])
+    append_span = messages.append_span
+    for timestamp, (_, line_id, level, module, start, end) in zip(timestamps, batch):
+        append_span(line_id, timestamp, level, module, start, end)
+    batch.clear()
+
+
+def _parse_chunk(file_path, start, end, lazy):
+    # Runs in a worker process; returns plain columns so the result pickles
+    parser = LogParser()
+    buffer = parser.map_file(file_path)
+    try:
+        index = MessageStore(mapped_source=buffer)
+        line_count, orphan_end = parser.index_range(buffer, index, start, end)
+        chunk = {"lines": line_count, "levels": index.levels, "modules": index.modules}
+        if lazy:
+            chunk["orphan_end"] = orphan_end
+            chunk["columns"] = index.columns()
+            return chunk
+
+        messages = MessageStore()
+        for row in range(len(index)):
+            messages.append(
+                index.ids[row],
+                index.timestamps[row],
+                index.get_level(row),
+                index.get_module(row),
+                index.get_message(row),
+            )
+        orphan_text = str(buffer[start:orphan_end], "utf-8", "replace")
+        chunk["orphan_text"] = join_continuation_lines(
+            io.StringIO(orphan_text, newline=None)
+        )
+        chunk["columns"] = messages.columns()
+        return chunk
+    finally:
+        buffer.close()
+
+
+if __name__ == "__main__":
+    # Headless queries: python -m log_parser --help
+    from log_query import main
+
+    raise SystemExit(main())
@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+from log_exporter import export_entries
+from log_merger import merge_spans
+from log_parser import LogParser
+from message_store import decode_mapped_body
+from payload_index import TRAJECTORY_MODULE, parse_conditions, payload_matches
+
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+def parse_time(value):
+    """
+    Read a time filter bound given like the log timestamps (date alone or
+    with seconds and fraction optional) or as a UNIX timestamp.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised time: {value!r}")
+
+
+def iter_entries(
+    file_paths,
+    levels=None,
+    modules=None,
+    start_time=None,
+    end_time=None,
+    text=None,
+    regex=False,
+    log_parser=None,
+    payload=None,
+):
+    """
+    Yield the entries of one or more logs that pass the same filters as the
+    viewer, as dicts with the keys of MessageStore.as_dict plus "source".
+    Several files are merged by timestamp.
+
+    Nothing is collected: files are read through their mappings one entry
+    at a time and a body is only decoded once the header filters pass, so
+    memory stays flat however large the logs are. `text` is matched as a
+    case-insensitive substring, or as a regular expression with `regex`.
+    `payload` takes TrajectoryGenerator filters such as "Duration > 1000".
+    """
+    log_parser = log_parser or LogParser()
+    levels = set(levels) if levels else None
+    modules = set(modules) if modules else None
+    start_time = float("-inf") if start_time is None else start_time
+    end_time = float("inf") if end_time is None else end_time
+    matcher = None
+    if text:
+        matcher = re.compile(text) if regex else re.compile(re.escape(text), re.I)
+    conditions = parse_conditions(payload) if payload else None
+
+    sources, buffers = [], []
+    try:
+        for file_path in file_paths:
+            buffer = log_parser.map_file(file_path)
+            if buffer is not None:
+                sources.append(file_path)
+                buffers.append(buffer)
+
+        for timestamp, code, line_id, level, module, start, end in merge_spans(
+            log_parser, buffers
+        ):
+            if not start_time <= timestamp <= end_time:
+                continue
+            if levels is not None and level not in levels:
+                continue
+            if modules is not None and module not in modules:
+                continue
+            if conditions is not None and module != TRAJECTORY_MODULE:
+                continue
+            message = decode_mapped_body(buffers[code][start:end])
+            if matcher is not None and not matcher.search(message):
+                continue
+            if conditions is not None and not payload_matches(message, conditions):
+                continue
+            yield {
+                "id": line_id,
+                "timestamp": timestamp,
+                "level": level,
+                "module": module,
+                "message": message,
+                "source": sources[code],
+            }
+    finally:
+        for buffer in buffers:
+            buffer.close()
+
+
+def format_entry(entry, show_source=False):
+    # One line per entry, laid out like the log itself
+    timestamp = datetime.fromtimestamp(entry["timestamp"])
+    line = (
+        f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}]"
+        f"[{entry['level']}][{entry['module']}] {entry['message']}"
+    )
+    if show_source:
+        line = f"{os.path.basename(entry['source'])}: {line}"
+    return line.rstrip("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m log_parser",
+        description="Stream the entries of log files that match the filters.",
+    )
+    parser.add_argument("files", nargs="+", help="log files, merged by timestamp")
+    parser.add_argument(
+        "-l", "--level", action="append", help="keep this level (repeatable)"
+    )
+    parser.add_argument(
+        "-m", "--module", action="append", help="keep this module (repeatable)"
+    )
+    parser.add_argument("--start", type=parse_time, help="earliest timestamp")
+    parser.add_argument("--end", type=parse_time, help="latest timestamp")
+    parser.add_argument("-s", "--search", help="text the message must contain")
+    parser.add_argument(
+        "--regex", action="store_true", help="treat --search as a regular expression"
+    )
+    parser.add_argument(
+        "-p",
+        "--payload",
+        help='TrajectoryGenerator filter, e.g. "Duration > 1000 and start z < 1990"',
+    )
+    parser.add_argument(
+        "--format", choices=("text", "jsonl"), default="text", help="output format"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="write to this .jsonl, .csv, .parquet or .arrow file instead",
+    )
+    args = parser.parse_args(argv)
+
+    entries = iter_entries(
+        args.files,
+        levels=args.level,
+        modules=args.module,
+        start_time=args.start,
+        end_time=args.end,
+        text=args.search,
+        regex=args.regex,
+        payload=args.payload,
+    )
+    show_source = len(args.files) > 1
+    write = sys.stdout.write
+    try:
+        if args.output:
+            count = export_entries(entries, args.output)
+            print(f"Exported {count} entries to {args.output}", file=sys.stderr)
+            return 0
+        for entry in entries:
+            if args.format == "jsonl":
+                write(json.dumps(entry, ensure_ascii=False) + "\n")
+            else:
+                write(format_entry(entry, show_source) + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        sys.stdout = open(os.devnull, "w")
+    except (OSError, re.error, ValueError, RuntimeError) as e:
+        print(f"Failed to query log files: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,372 @@
+"""
+Receive log lines over TCP and UDP and keep the latest of them in memory.
+
+    python log_server.py --port 5140 --max-mb 64 --spill evicted.log
+
+Senders write the usual [timestamp][level][module] message lines, one per
+line over TCP or one or more per UDP datagram (a syslog <priority> prefix
+is ignored). The viewer runs the same server from File > Listen for Log
+Streams.
+"""
+import argparse
+import asyncio
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from log_parser import ENTRY_PATTERN, LogParser
+from message_store import decode_mapped_body
+from perf_stats import STATS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5140
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+READ_BYTES = 256 * 1024
+ENTRY_OVERHEAD = 160  # rough cost of an entry's tuple and objects, in bytes
+PENDING_FLUSH_SECONDS = 0.2  # a quiet sender's last entry is complete after this
+STATUS_SECONDS = 5
+SYSLOG_PRIORITY = re.compile(rb"<\d{1,3}>")
+
+
+def entry_message(entry):
+    # The message text exactly as it would read from a log file
+    _, _, _, raw, body_start = entry
+    return decode_mapped_body(raw[body_start:])
+
+
+class RingBuffer:
+    """
+    The most recent streamed entries, within a memory cap.
+
+    Entries are (timestamp, level, module, raw lines, body start) tuples
+    numbered by arrival; they are kept in batches as they were received,
+    and whole batches are evicted oldest first once the raw bytes (plus a
+    fixed per-entry overhead) pass `max_bytes`. With a `spill_path`,
+    evicted entries are appended there as the original lines, so the
+    segment is a plain log the viewer can open. Safe to read from another
+    thread while the server appends; readers never wait on spill writes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_path=None):
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.batches = deque()  # (first sequence number, entries, bytes)
+        self.size = 0
+        self.first_seq = 0  # sequence number of the oldest entry kept
+        self.next_seq = 0
+        self.spilled = 0
+        self._spill = None
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()  # spill file writes, in order
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def extend(self, entries):
+        if not entries:
+            return
+        size = sum(len(entry[3]) for entry in entries) + ENTRY_OVERHEAD * len(entries)
+        with self._lock:
+            self.batches.append((self.next_seq, entries, size))
+            self.next_seq += len(entries)
+            self.size += size
+            evicted = []
+            while self.size > self.max_bytes and len(self.batches) > 1:
+                _, batch, batch_size = self.batches.popleft()
+                self.size -= batch_size
+                self.first_seq += len(batch)
+                evicted.append(batch)
+            spill = evicted and self.spill_path is not None
+            if spill:
+                # Taken before the ring is released so spills keep their order
+                self._spill_lock.acquire()
+        if spill:
+            try:
+                self._spill_batches(evicted)
+            finally:
+                self._spill_lock.release()
+        STATS.count("ingested entries", len(entries))
+
+    def since(self, seq):
+        """
+        Return (sequence number, entries) for the entries numbered `seq`
+        onwards, or from the oldest one kept if `seq` was already evicted.
+        """
+        with self._lock:
+            parts = []
+            for start, batch, _ in reversed(self.batches):
+                if start + len(batch) <= seq:
+                    break
+                parts.append(batch[max(0, seq - start) :])
+            first = max(seq, self.first_seq)
+        entries = []
+        for part in reversed(parts):
+            entries.extend(part)
+        return first, entries
+
+    def close(self):
+        with self._spill_lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    def _spill_batches(self, batches):
+        try:
+            if self._spill is None:
+                self._spill = open(self.spill_path, "ab")
+            for batch in batches:
+                self._spill.write(b"".join(entry[3] for entry in batch))
+                self.spilled += len(batch)
+            self._spill.flush()
+        except OSError as e:
+            print(f"Failed to spill log entries: {e}")
+            self.spill_path = None  # keep serving; stop trying to spill
+
+
+class _EntryReader:
+    # Splits one sender's bytes into entries, holding the newest one open
+    # for continuation lines until the next entry line or a flush
+    def __init__(self, log_parser):
+        self.decode_timestamp = log_parser.timestamp_decoder.decode
+        self.names = {}  # raw level/module bytes -> decoded name
+        self.tail = b""  # an unterminated last line
+        self.pending = None
+        self.last_feed = time.monotonic()
+
+    def feed(self, data):
+        self.last_feed = time.monotonic()
+        lines = (self.tail + data).splitlines(keepends=True)
+        self.tail = b""
+        if lines and not lines[-1].endswith((b"\n", b"\r")):
+            self.tail = lines.pop()
+        entries = []
+        for line in lines:
+            self._line(line, entries)
+        return entries
+
+    def flush(self):
+        # Everything held back, for a closed or quiet sender
+        entries = []
+        if self.tail:
+            self._line(self.tail + b"\n", entries)
+            self.tail = b""
+        if self.pending is not None:
+            entries.append(self._finish(self.pending))
+            self.pending = None
+        return entries
+
+    def _line(self, line, entries):
+        if line[:1] == b"<":
+            priority = SYSLOG_PRIORITY.match(line)
+            if priority:
+                line = line[priority.end() :]
+        stripped = line.lstrip()
+        match = ENTRY_PATTERN.match(stripped.rstrip())
+        if match:
+            timestamp, level, module, _ = match.groups()
+            try:
+                timestamp = self.decode_timestamp(timestamp)
+            except (UnicodeDecodeError, ValueError):
+                match = None  # not a timestamp; read it as a continuation
+        if match:
+            if self.pending is not None:
+                entries.append(self._finish(self.pending))
+            names = self.names
+            for name in (level, module):
+                if name not in names:
+                    names[name] = name.decode("utf-8", errors="replace")
+            body_start = len(line) - len(stripped) + match.start(4)
+            self.pending = [timestamp, names[level], names[module], [line], body_start]
+        elif self.pending is not None:
+            self.pending[3].append(line)
+        # Continuation lines before a sender's first entry have no owner
+
+    def _finish(self, pending):
+        timestamp, level, module, lines, body_start = pending
+        return timestamp, level, module, b"".join(lines), body_start
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.reader = _EntryReader(server.log_parser)
+
+    def datagram_received(self, data, addr):
+        # Each datagram is complete on its own
+        entries = self.reader.feed(data if data.endswith(b"\n") else data + b"\n")
+        entries.extend(self.reader.flush())
+        self.server.ring.extend(entries)
+
+
+class LogServer:
+    """
+    asyncio TCP and UDP listeners feeding a RingBuffer.
+
+    Each TCP connection gets its own entry reader, so continuation lines
+    stay with their sender; a read is parsed as one batch and appended
+    under a single lock. Runs headless with serve_forever() or next to the
+    Tk loop with start_in_thread(), where the UI drains the ring with
+    RingBuffer.since() and never waits on the network.
+    """
+
+    def __init__(
+        self, log_parser, ring, host=DEFAULT_HOST, tcp_port=DEFAULT_PORT, udp_port=None
+    ):
+        self.log_parser = log_parser
+        self.ring = ring
+        self.host = host
+        self.tcp_port = tcp_port
+        self.udp_port = tcp_port if udp_port is None else udp_port
+        self._connections = {}  # entry reader -> stream writer
+        self._tcp_server = None
+        self._udp_transport = None
+        self._flusher = None
+        self._loop = None
+        self._thread = None
+
+    async def start(self):
+        """
+        Bind both listeners. Port 0 picks a free port; tcp_port and
+        udp_port hold the bound ports afterwards.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._tcp_server = await asyncio.start_server(
+            self._serve_connection, self.host, self.tcp_port
+        )
+        self.tcp_port = self._tcp_server.sockets[0].getsockname()[1]
+        try:
+            self._udp_transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _UdpProtocol(self), local_addr=(self.host, self.udp_port)
+            )
+        except OSError:
+            self._tcp_server.close()
+            raise
+        self.udp_port = self._udp_transport.get_extra_info("sockname")[1]
+        self._flusher = self._loop.create_task(self._flush_quiet_senders())
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._tcp_server.serve_forever()
+        finally:
+            self._close()
+            self.ring.close()
+
+    def start_in_thread(self):
+        """
+        Run the server on its own event loop thread. Returns once the
+        listeners are bound; raises OSError if they cannot be.
+        """
+        started = threading.Event()
+        error = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except OSError as e:
+                error.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                self._close()
+                # Let the closed connections hand over what they still hold
+                tasks = asyncio.all_tasks(loop)
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                loop.close()
+                self.ring.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if error:
+            raise error[0]
+
+    def stop(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    async def _serve_connection(self, reader, writer):
+        entries = _EntryReader(self.log_parser)
+        self._connections[entries] = writer
+        try:
+            while True:
+                data = await reader.read(READ_BYTES)
+                if not data:
+                    break
+                self.ring.extend(entries.feed(data))
+        except ConnectionError:
+            pass  # the sender went away; keep what it sent
+        finally:
+            self._connections.pop(entries, None)
+            self.ring.extend(entries.flush())
+            writer.close()
+
+    async def _flush_quiet_senders(self):
+        # A sender's newest entry is held back for continuation lines;
+        # release it once the sender has been quiet for a moment
+        while True:
+            await asyncio.sleep(PENDING_FLUSH_SECONDS)
+            now = time.monotonic()
+            for entries in list(self._connections):
+                if now - entries.last_feed >= PENDING_FLUSH_SECONDS:
+                    self.ring.extend(entries.flush())
+
+    def _close(self):
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+        if self._flusher is not None:
+            self._flusher.cancel()
+        for writer in list(self._connections.values()):
+            writer.transport.abort()  # the reads end and flush
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--host", default=DEFAULT_HOST)
+    arg_parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="TCP and UDP port"
+    )
+    arg_parser.add_argument(
+        "--max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024**2
+    )
+    arg_parser.add_argument("--spill", help="append evicted entries to this file")
+    args = arg_parser.parse_args()
+
+    ring = RingBuffer(int(args.max_mb * 1024**2), args.spill)
+    server = LogServer(LogParser(), ring, args.host, args.port)
+
+    async def run():
+        await server.start()
+        print(
+            f"Listening on {args.host} TCP {server.tcp_port} UDP {server.udp_port}",
+            file=sys.stderr,
+        )
+        while True:
+            await asyncio.sleep(STATUS_SECONDS)
+            print(
+                f"{ring.next_seq} entries received, {len(ring)} kept,"
+                f" {ring.spilled} spilled",
+                file=sys.stderr,
+            )
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from array import array
+from bisect import bisect_left
+
+from time_histogram import TimeHistogram
+
+RATE_BUCKETS = 4096  # finest grid the dashboard can show
+INTERVAL_PERCENTILES = (50, 90, 99)
+INTERVAL_SAMPLE_ROWS = 200000  # beyond this, gaps are measured on sampled runs
+INTERVAL_RUNS = 20
+
+
+class RateIndex(TimeHistogram):
+    """
+    Message counts per time bucket for every (module, level) pair seen.
+
+    Same doubling grid as the time histogram, on a finer grid, with one
+    count array per pair instead of per level. It is extended with the other
+    indexes, so the dashboard only sums ready-made arrays and never goes
+    back to the rows.
+    """
+
+    def __init__(self, messages, buckets=RATE_BUCKETS):
+        super().__init__(messages, buckets)
+        self.pairs = []  # pair code -> (module code, level code)
+        self._pair_codes = {}
+
+    def extend(self, row_end=None):
+        messages = self.messages
+        row_end = len(messages) if row_end is None else row_end
+        start = self.rows_indexed
+        if row_end <= start:
+            return
+        timestamps = messages.timestamps[start:row_end]
+        self._cover(min(timestamps), max(timestamps))
+
+        low, width, counts = self.bins
+        pair_codes = self._pair_codes
+        last = self.buckets - 1
+        for timestamp, module_code, level_code in zip(
+            timestamps,
+            messages.module_codes[start:row_end],
+            messages.level_codes[start:row_end],
+        ):
+            pair = (module_code, level_code)
+            code = pair_codes.get(pair)
+            if code is None:
+                # Counts first, so a reader never sees a pair without them
+                counts.append(array("L", bytes(self.buckets * array("L").itemsize)))
+                code = pair_codes[pair] = len(self.pairs)
+                self.pairs.append(pair)
+            bucket = int((timestamp - low) / width)
+            counts[code][bucket if bucket < last else last] += 1
+        self.rows_indexed = row_end
+
+
+def module_stats(messages, indexes, start_time, end_time, bucket_seconds, top=10):
+    """
+    Summarise the modules between `start_time` and `end_time`.
+
+    Rates come from the RateIndex grid, grouped into buckets of about
+    `bucket_seconds` (a whole number of grid buckets, the edges rounded out
+    to the grid). Returns (bucket width, first bucket start, entries) with
+    one dict per module for the `top` busiest, busiest first:
+        module, total, rate (messages/s over the window), peak_rate,
+        peak_time, levels (level -> count), rates (messages/s per bucket),
+        level_rates (level -> messages/s per bucket) and intervals
+        (percentile -> seconds between consecutive messages).
+    """
+    rate_index = indexes.rate_index
+    if rate_index.bins is None:
+        return bucket_seconds, start_time, []
+    low, width, counts = rate_index.bins
+    first = rate_index.bucket_of(start_time)
+    last = rate_index.bucket_of(end_time) + 1
+    group = max(1, round(bucket_seconds / width))
+    group_seconds = group * width
+    window_seconds = max(end_time - start_time, width)
+
+    modules = {}
+    for (module_code, level_code), level_counts in zip(rate_index.pairs, counts):
+        grouped = [
+            sum(level_counts[bucket : min(bucket + group, last)])
+            for bucket in range(first, last, group)
+        ]
+        total = sum(grouped)
+        if not total:
+            continue
+        module = modules.setdefault(
+            module_code, {"module": messages.modules[module_code], "levels": {}}
+        )
+        module["levels"][messages.levels[level_code]] = (total, grouped)
+
+    entries = []
+    for module_code, module in modules.items():
+        levels = module.pop("levels")
+        grouped = [sum(column) for column in zip(*(c for _, c in levels.values()))]
+        peak = max(range(len(grouped)), key=grouped.__getitem__)
+        module.update(
+            code=module_code,
+            total=sum(total for total, _ in levels.values()),
+            levels={level: total for level, (total, _) in levels.items()},
+            rates=[count / group_seconds for count in grouped],
+            level_rates={
+                level: [count / group_seconds for count in level_grouped]
+                for level, (_, level_grouped) in levels.items()
+            },
+            peak_rate=grouped[peak] / group_seconds,
+            peak_time=low + (first + peak * group) * width,
+        )
+        module["rate"] = module["total"] / window_seconds
+        entries.append(module)
+
+    entries.sort(key=lambda entry: entry["total"], reverse=True)
+    entries = entries[:top]
+    for entry in entries:
+        entry["intervals"] = interval_percentiles(
+            messages, indexes, entry.pop("code"), start_time, end_time
+        )
+    return group_seconds, low + first * width, entries
+
+
+def interval_percentiles(messages, indexes, module_code, start_time, end_time):
+    """
+    Return {percentile: seconds} for the gaps between consecutive messages
+    of one module inside the time window, plus "max". Only that module's
+    rows in the window are read, through its posting list; when there are
+    more than INTERVAL_SAMPLE_ROWS, gaps come from evenly spread runs of
+    consecutive rows so the cost stays bounded on very large logs.
+    """
+    window = indexes.time_index.window(start_time, end_time)
+    posting = indexes.filter_index.module_rows[module_code]
+    timestamps = messages.timestamps
+    low = bisect_left(posting, window.row_low)
+    high = bisect_left(posting, window.row_high)
+    if high - low > INTERVAL_SAMPLE_ROWS:
+        run = INTERVAL_SAMPLE_ROWS // INTERVAL_RUNS
+        step = (high - low - run) // (INTERVAL_RUNS - 1)
+        runs = [
+            posting[start : start + run]
+            for start in range(low, high - run + 1, step)
+        ]
+    else:
+        module_codes = messages.module_codes
+        extra = [row for row in window.extra if module_codes[row] == module_code]
+        runs = [posting[low:high] + array("q", extra)]
+
+    gaps = []
+    for rows in runs:
+        # Late rows make the file order slightly unsorted, and excluded ones
+        # are dropped by the time check
+        times = sorted(
+            time
+            for time in (timestamps[row] for row in rows)
+            if start_time <= time <= end_time
+        )
+        gaps.extend(b - a for a, b in zip(times, times[1:]))
+    if not gaps:
+        return {}
+    gaps.sort()
+    result = {
+        percentile: gaps[min(len(gaps) - 1, len(gaps) * percentile // 100)]
+        for percentile in INTERVAL_PERCENTILES
+    }
+    result["max"] = gaps[-1]
+    return result
+
@@ -5,10 +5,32 @@ from tkinter import ttk
 import re
 from datetime import datetime
 import os
+import time
 from gui_components import GUIComponents
+from compressed_log import is_compressed
 from file_handler import FileHandler
+from log_exporter import LogExporter
+from log_follower import LogFollower
+from log_indexes import LogIndexes, close_store
+from log_server import DEFAULT_HOST, DEFAULT_PORT, LogServer, RingBuffer, entry_message
+from log_loader import LogLoader
+from log_stats import module_stats
 from log_parser import LogParser
 from message_manager import MessageManager
+from message_store import MessageStore
+from parse_cache import ParseCache
+from payload_index import parse_conditions
+from perf_stats import PROFILER, STATS
+
+LOADER_POLL_MS = 50
+EXPORT_POLL_MS = 100
+TEMPLATE_POLL_MS = 500  # regroup this often while templates are being mined
+SEARCH_POLL_MS = 200  # refresh this often while a search or payload filter runs
+SLIDER_FRAME_MS = 16  # slider moves are evaluated at most once per frame
+DISPLAY_REFRESH_SECONDS = 1.0  # minimum interval between redraws while loading
+FOLLOW_POLL_MS = 500
+STREAM_POLL_MS = 200
+SAVED_MESSAGES_FLUSH_MS = 2000  # saves made in quick succession share a write
 
 
 class LogViewerApp:
@@ -17,14 +39,44 @@ class LogViewerApp:
         self.gui = GUIComponents(root)
         self.file_handler = FileHandler()
         self.log_parser = LogParser()
+        self.parse_cache = ParseCache()
         self.message_manager = MessageManager(self.gui.saved_messages_listbox)
 
-        self.messages = []
+        self.messages = MessageStore()
+        self.indexes = LogIndexes(self.messages)
         self.log_levels = set()
         self.modules = set()
         self.current_log_file = None
         self.last_opened_dir = None
 
+        # Loading state; rows below rows_loaded are complete and safe to read
+        self.log_loader = LogLoader(self.log_parser, self.parse_cache)
+        self.loading = False
+        self.rows_loaded = 0
+        self.last_refresh = 0
+        self.sliders_ready = False
+        self.min_timestamp = self.max_timestamp = 0
+        self.start_timestamp = self.end_timestamp = 0
+        self.time_span = 1
+        self.start_pos, self.end_pos = 0, 1000
+        self.display_update_pending = None
+        self.filtered_rows = []
+        self.template_poll_pending = None
+        self.search_poll_pending = None
+
+        # Exports of the filtered view run on their own worker thread
+        self.log_exporter = LogExporter()
+
+        # Follow mode; the follower is tied to the store it was created for
+        self.log_follower = None
+        self.follow_pending = None
+
+        # Streamed logs; the store holds ring entries from store_first_seq on
+        self.log_server = None
+        self.stream_ring = None
+        self.stream_pending = None
+        self.store_first_seq = self.stream_seq = 0
+
         self.setup()
 
         # self.root.title("Log Viewer")
@@ -45,10 +97,24 @@ class LogViewerApp:
         # self.create_widgets()
 
     def setup(self):
-        self.gui.create_menu(self.open_log_file)
+        self.gui.create_menu(
+            self.open_log_file,
+            self.toggle_follow,
+            self.export_filtered_view,
+            self.toggle_listen,
+        )
+        self.gui.create_view_menu(
+            self.toggle_overlay, self.toggle_profiling, self.show_module_stats
+        )
         self.gui.create_frames()
         self.gui.create_controls(self.update_display)
-        self.gui.create_log_display(self.update_display)
+        self.gui.create_log_display(self.on_message_select)
+        self.gui.create_progress_bar()
+        self.gui.create_search_bar(self.update_display)
+        self.gui.create_template_view(self.expand_template, self.show_template_row)
+
+        # create_controls replaced the listbox the manager was given
+        self.message_manager.saved_messages_listbox = self.gui.saved_messages_listbox
 
         # Bind events
         self.gui.saved_messages_listbox.bind(
@@ -64,57 +130,313 @@ class LogViewerApp:
         # Use the last opened directory if available
         initial_dir = self.last_opened_dir if self.last_opened_dir else os.getcwd()
 
-        file_path = filedialog.askopenfilename(
-            filetypes=[("Log files", "*.log"), ("All files", "*.*")],
+        # Several files are opened together as one merged timeline
+        file_paths = filedialog.askopenfilenames(
+            filetypes=[
+                ("Log files", "*.log *.log.*"),
+                ("Compressed logs", "*.gz *.zst *.xz"),
+                ("All files", "*.*"),
+            ],
             initialdir=initial_dir,
         )
-        if not file_path:
+        if not file_paths:
             return
 
-        self.current_log_file = file_path
+        # Saved messages and follow mode work on a single file
+        self.current_log_file = file_paths[0] if len(file_paths) == 1 else None
         self.save_last_directory()
 
-        # Parse the file
-        self.messages = self.log_parser.parse(file_path)
-        self.last_opened_dir = os.path.dirname(file_path)
+        self.last_opened_dir = os.path.dirname(file_paths[0])
+        self.load_log_files(file_paths)
+
+    def load_log_files(self, file_paths):
+        # Index the files on a worker thread; rows show up as batches arrive.
+        # A still-running load is cancelled and closes its own store.
+        self.stop_listening()
+        self.retire_store()
+        self.messages = MessageStore()
+        self.indexes = LogIndexes(self.messages)
+        self.log_follower = None
+        self.rows_loaded = 0
+        self.gui.clear_filters()
+        self.gui.populate_log_tree(self.messages, [])
+        if len(file_paths) == 1:
+            self.log_loader.start(file_paths[0])
+        else:
+            self.log_loader.start_merged(file_paths)
 
-        # Normalize timestamps and store in messages
-        # for msg in self.messages:
-        #     msg["normalized_timestamp"] = (
-        #         (msg["timestamp"] - self.min_timestamp) / self.time_span * 1000
-        #     )
+        self.message_manager.load_saved_messages(self.current_log_file)
 
-        # Extract log levels and modules
-        self.log_levels = {msg["level"] for msg in self.messages}
-        self.modules = {msg["module"] for msg in self.messages}
+        if not self.loading:
+            self.loading = True
+            self.poll_loader()
+
+    def retire_store(self):
+        # Workers only notice a cancel between rows, so the store is closed
+        # once the last one reading it has stopped
+        workers = self.indexes.cancel() + self.log_exporter.cancel()
+        if not self.loading:
+            close_store(self.messages, workers)
+
+    def poll_loader(self):
+        for event in self.log_loader.poll():
+            kind = event[0]
+            if kind == "started":
+                _, self.messages, self.indexes = event
+                self.start_pos, self.end_pos = 0, 1000
+                self.sliders_ready = False
+                self.last_refresh = 0
+            elif kind == "progress":
+                _, self.rows_loaded, done, total = event
+                self.gui.show_progress(self.rows_loaded, done, total)
+                self.refresh_loaded_data()
+            elif kind == "done":
+                self.rows_loaded = event[1]
+                self.loading = False
+                self.gui.hide_progress()
+                self.refresh_loaded_data(force=True)
+                self.indexes.search_index.build_in_background(self.rows_loaded)
+                self.indexes.template_index.build_in_background(self.rows_loaded)
+                if self.gui.overlay_var.get():
+                    self.refresh_overlay()
+            elif kind == "error":
+                self.loading = False
+                self.gui.hide_progress()
+                messagebox.showerror("Error", f"Failed to read log file: {event[1]}")
+
+        if self.loading:
+            self.root.after(LOADER_POLL_MS, self.poll_loader)
+
+    def export_filtered_view(self):
+        if self.loading or self.log_exporter.running:
+            messagebox.showinfo("Export", "Wait for the current operation to finish")
+            return
+        rows = self.gui.log_table.rows
+        if not len(rows):
+            messagebox.showinfo("Export", "The filtered view is empty")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export filtered view",
+            initialdir=self.last_opened_dir,
+            defaultextension=".jsonl",
+            filetypes=[
+                ("JSON Lines", "*.jsonl"),
+                ("CSV", "*.csv"),
+                ("Parquet", "*.parquet"),
+                ("Arrow", "*.arrow"),
+            ],
+        )
+        if not path:
+            return
+        # The rows are a snapshot; later filter changes do not affect it
+        self.log_exporter.start(
+            self.messages, rows, path, source=self.current_log_file or ""
+        )
+        self.poll_exporter()
+
+    def poll_exporter(self):
+        for event in self.log_exporter.poll():
+            kind = event[0]
+            if kind == "progress":
+                _, written, total = event
+                self.gui.show_progress(written, written, total, action="Exporting")
+            elif kind == "done":
+                self.gui.hide_progress()
+                messagebox.showinfo(
+                    "Export", f"Exported {event[1]} messages to {event[2]}"
+                )
+            elif kind == "error":
+                self.gui.hide_progress()
+                messagebox.showerror("Error", f"Failed to export: {event[1]}")
+        if self.log_exporter.running:
+            self.root.after(EXPORT_POLL_MS, self.poll_exporter)
+
+    def toggle_follow(self):
+        self.gui.log_table.stick_to_end = self.gui.follow_var.get()
+        if self.gui.follow_var.get():
+            if self.follow_pending is None:
+                self.poll_follower()
+        elif self.follow_pending is not None:
+            self.root.after_cancel(self.follow_pending)
+            self.follow_pending = None
+
+    def poll_follower(self):
+        self.follow_pending = self.root.after(FOLLOW_POLL_MS, self.poll_follower)
+        if (
+            self.loading
+            or self.log_exporter.running
+            or self.current_log_file is None
+            or is_compressed(self.current_log_file)
+        ):
+            return  # merged and compressed logs are not followed
+        try:
+            follower = self.log_follower
+            if follower is None or follower.messages is not self.messages:
+                self.log_follower = LogFollower(
+                    self.log_parser, self.messages, self.current_log_file
+                )
+                return
+            with STATS.span("follow"):
+                consumed = self.log_follower.poll()
+        except Exception as e:
+            print(f"Failed to follow log file: {e}")
+            return
 
-        # Get time range from parsed messages
-        self.min_timestamp, self.max_timestamp = self.log_parser.get_time_range(
-            self.messages
+        if consumed == "reset":
+            # Truncated or rotated: start over on whatever is there now
+            self.load_log_files([self.current_log_file])
+        elif consumed:
+            self.rows_loaded = len(self.messages)
+            self.indexes.extend()
+            self.refresh_loaded_data(force=True)
+            self.indexes.search_index.build_in_background()
+            self.indexes.template_index.build_in_background()
+
+    def toggle_listen(self):
+        if not self.gui.listen_var.get():
+            self.stop_listening()
+            return
+        if self.loading or self.log_exporter.running:
+            self.gui.listen_var.set(False)
+            messagebox.showinfo("Listen", "Wait for the current operation to finish")
+            return
+        address = simpledialog.askstring(
+            "Listen for Log Streams",
+            "Address (host:port) for TCP and UDP senders:",
+            initialvalue=f"{DEFAULT_HOST}:{DEFAULT_PORT}",
+        )
+        try:
+            host, port = address.rsplit(":", 1)
+            port = int(port)
+        except (AttributeError, ValueError):
+            self.gui.listen_var.set(False)
+            return
+        # Entries evicted from memory can be kept in a plain log file
+        spill_path = filedialog.asksaveasfilename(
+            title="Keep evicted messages in (cancel to drop them)",
+            initialdir=self.last_opened_dir,
+            defaultextension=".log",
         )
 
-        self.start_timestamp = self.min_timestamp
-        self.end_timestamp = self.max_timestamp
+        ring = RingBuffer(spill_path=spill_path or None)
+        server = LogServer(self.log_parser, ring, host, port)
+        try:
+            server.start_in_thread()
+        except OSError as e:
+            print(f"Failed to listen on {address}: {e}")
+            self.gui.listen_var.set(False)
+            messagebox.showerror("Error", f"Failed to listen on {address}: {e}")
+            return
 
-        self.time_span = (
-            self.max_timestamp - self.min_timestamp or 1
-        )  # Avoid division by zero
+        self.log_server, self.stream_ring = server, ring
+        self.gui.follow_var.set(False)
+        self.toggle_follow()
+        self.current_log_file = None
+        self.message_manager.load_saved_messages(None)
+        self.reset_stream_store(0)
+        self.gui.log_table.stick_to_end = True
+        self.poll_stream()
+
+    def stop_listening(self):
+        if self.stream_pending is not None:
+            self.root.after_cancel(self.stream_pending)
+            self.stream_pending = None
+        if self.log_server is not None:
+            self.log_server.stop()
+            self.log_server = self.stream_ring = None
+            self.gui.log_table.stick_to_end = False
+        self.gui.listen_var.set(False)
+
+    def reset_stream_store(self, first_seq):
+        # A fresh store whose first row is ring entry `first_seq`
+        self.retire_store()
+        self.messages = MessageStore()
+        self.indexes = LogIndexes(self.messages)
+        self.rows_loaded = 0
+        self.store_first_seq = self.stream_seq = first_seq
+        self.start_pos, self.end_pos = 0, 1000
+        self.sliders_ready = False
+        self.gui.clear_filters()
+        self.gui.populate_log_tree(self.messages, [])
+
+    def poll_stream(self):
+        self.stream_pending = self.root.after(STREAM_POLL_MS, self.poll_stream)
+        if self.log_exporter.running:
+            return  # the export reads the store; it grows again afterwards
+        first, entries = self.stream_ring.since(self.stream_seq)
+        if not entries:
+            return
+        # The store only grows, so once most of its rows have left the ring
+        # it is rebuilt from what the ring still holds
+        evicted = first - self.store_first_seq
+        if evicted > len(self.messages) // 2:
+            self.reset_stream_store(first)
+        with STATS.span("stream ingest") as span:
+            append = self.messages.append
+            for seq, entry in enumerate(entries, first):
+                timestamp, level, module, _, _ = entry
+                append(seq, timestamp, level, module, entry_message(entry))
+            span.add_rows(len(entries))
+        self.stream_seq = first + len(entries)
+        self.rows_loaded = len(self.messages)
+        self.indexes.extend()
+        self.refresh_loaded_data(force=True)
+        self.indexes.search_index.build_in_background()
+        self.indexes.template_index.build_in_background()
+
+    def on_message_select(self, event):
+        self.gui.log_table.remember_selection()
+
+    def refresh_loaded_data(self, force=False):
+        if not self.rows_loaded:
+            return
 
-        # Update GUI with parsed data
+        # Extract log levels and modules
+        self.log_levels = set(self.messages.levels)
+        self.modules = set(self.messages.modules)
         self.gui.update_log_levels(self.log_levels, self.update_display)
         self.gui.update_modules(self.modules, self.update_display)
+        self.gui.update_sources(self.messages.sources, self.update_display)
 
-        # Update the time sliders
-        min_time, max_time = self.log_parser.get_time_range(self.messages)
-        self.gui.create_time_sliders(self.update_start_time, self.update_end_time)
-        self.gui.update_time_sliders(min_time, max_time)
-
-        self.message_manager.load_saved_messages(self.current_log_file)
+        # Follow the growing time range, keeping the slider positions
+        self.min_timestamp, self.max_timestamp = self.log_parser.get_time_range(
+            self.messages
+        )
+        self.time_span = (
+            self.max_timestamp - self.min_timestamp or 1
+        )  # Avoid division by zero
+        self.start_timestamp = (
+            self.min_timestamp + (self.start_pos / 1000) * self.time_span
+        )
+        self.end_timestamp = self.min_timestamp + (self.end_pos / 1000) * self.time_span
+        if not self.sliders_ready:
+            if self.gui.start_time_slider is None:
+                self.gui.create_time_sliders(
+                    self.update_start_time, self.update_end_time
+                )
+                self.gui.bind_time_histogram(self.select_histogram_range)
+            self.gui.update_time_sliders(self.min_timestamp, self.max_timestamp)
+            self.sliders_ready = True
+        else:
+            self.gui.update_start_time_display(self.start_timestamp)
+            self.gui.update_end_time_display(self.end_timestamp)
 
-        # Update display
-        self.update_display()
+        # Redrawing the whole table is costly, so throttle it while loading
+        now = time.monotonic()
+        if force or now - self.last_refresh >= DISPLAY_REFRESH_SECONDS:
+            self.last_refresh = now
+            self.update_display()
 
     def update_display(self):
+        with STATS.operation("update display"):
+            self._update_display()
+        STATS.count("display updates")
+        if self.gui.stats_window is not None:
+            self.refresh_module_stats()
+        if self.gui.overlay_var.get():
+            self.refresh_overlay()
+
+    def _update_display(self):
         selected_levels = {
             level for level, var in self.gui.log_level_vars.items() if var.get()
         }
@@ -122,16 +444,216 @@ class LogViewerApp:
             module for module, var in self.gui.module_vars.items() if var.get()
         }
 
-        filtered_messages = [
-            msg
-            for msg in self.messages
-            if msg["level"] in selected_levels
-            and msg["module"] in selected_modules
-            and self.start_timestamp <= msg["timestamp"] <= self.end_timestamp
+        # Answer the filter from the posting lists and the time index
+        level_codes = [
+            code
+            for code, level in enumerate(self.messages.levels)
+            if level in selected_levels
         ]
+        module_codes = [
+            code
+            for code, module in enumerate(self.messages.modules)
+            if module in selected_modules
+        ]
+        source_codes = None
+        if self.gui.source_vars:
+            source_codes = [
+                code
+                for code, source in enumerate(self.messages.sources)
+                if self.gui.source_vars[source].get()
+            ]
+        payload_conditions = None
+        invalid_payload = False
+        if self.gui.payload_var.get().strip():
+            try:
+                payload_conditions = parse_conditions(self.gui.payload_var.get())
+            except ValueError:
+                invalid_payload = True
+        self.gui.mark_payload_invalid(invalid_payload)
+
+        if payload_conditions and self.search_poll_pending is None:
+            # Payloads are extracted on a worker thread; read before the
+            # filter so a finished extraction is never missed
+            if self.indexes.payload_index.rows_indexed < self.rows_loaded:
+                self.search_poll_pending = self.root.after(
+                    SEARCH_POLL_MS, self.poll_search
+                )
+
+        with STATS.span("filter") as span:
+            filtered_rows = self.indexes.select(
+                level_codes,
+                module_codes,
+                self.start_timestamp,
+                self.end_timestamp,
+                self.rows_loaded,
+                source_codes,
+                payload_conditions,
+            )
+            span.add_rows(len(filtered_rows))
+
+        level_counts, module_counts = self.indexes.counts(
+            self.start_timestamp, self.end_timestamp, self.rows_loaded
+        )
+        self.gui.update_filter_counts(
+            dict(zip(self.messages.levels, level_counts)),
+            dict(zip(self.messages.modules, module_counts)),
+        )
+
+        # Narrow by the search box; the trigram index prunes the candidates
+        query = self.gui.search_var.get()
+        invalid_query = False
+        if query:
+            try:
+                with STATS.span("search", len(filtered_rows)):
+                    filtered_rows, complete = self.indexes.search_index.search(
+                        query, filtered_rows, regex=self.gui.search_regex_var.get()
+                    )
+                if not complete and self.search_poll_pending is None:
+                    # Large searches are confirmed on a worker thread
+                    self.search_poll_pending = self.root.after(
+                        SEARCH_POLL_MS, self.poll_search
+                    )
+            except re.error:
+                invalid_query = True
+                filtered_rows = []
+        self.gui.mark_search_invalid(invalid_query)
 
         # Display messages in the log tree
-        self.gui.populate_log_tree(filtered_messages)
+        self.filtered_rows = filtered_rows
+        with STATS.span("render", len(filtered_rows)):
+            self.gui.populate_log_tree(self.messages, filtered_rows)
+        if self.gui.group_var.get():
+            self.show_template_groups(filtered_rows)
+        else:
+            self.gui.hide_template_groups()
+        with STATS.span("histogram"):
+            self.gui.draw_time_histogram(
+                self.indexes.histogram,
+                self.messages.levels,
+                self.min_timestamp,
+                self.max_timestamp,
+                self.start_timestamp,
+                self.end_timestamp,
+            )
+
+    def show_template_groups(self, rows):
+        template_index = self.indexes.template_index
+        if template_index.rows_indexed < self.rows_loaded:
+            # Mine on a worker thread and regroup until it has caught up
+            template_index.build_in_background(self.rows_loaded)
+            if self.template_poll_pending is None:
+                self.template_poll_pending = self.root.after(
+                    TEMPLATE_POLL_MS, self.poll_template_index
+                )
+        with STATS.span("group", len(rows)):
+            groups = [
+                (template_id, template_index.template_text(template_id), *group)
+                for template_id, *group in template_index.group(rows)
+            ]
+        self.gui.show_template_groups(self.messages, groups)
+
+    def poll_search(self):
+        self.search_poll_pending = None
+        self.update_display()
+
+    def poll_template_index(self):
+        # Only the grouping changes as mining goes on, so regroup the rows
+        # on display instead of running the whole update
+        self.template_poll_pending = None
+        if self.gui.group_var.get():
+            self.show_template_groups(self.gui.log_table.rows)
+
+    def expand_template(self, template_id, limit):
+        return self.indexes.template_index.rows_of(
+            template_id, self.filtered_rows, limit
+        )
+
+    def show_template_row(self, row):
+        # Back to the flat view, on the row picked from a group
+        self.gui.group_var.set(False)
+        self.update_display()
+        self.gui.select_message_in_log_tree(row)
+
+    def show_module_stats(self):
+        self.gui.show_stats_window(self.refresh_module_stats)
+        self.refresh_module_stats()
+
+    def refresh_module_stats(self):
+        # Follows the time window of the sliders
+        try:
+            bucket_seconds = self.gui.stats_bucket_var.get()
+            top = self.gui.stats_top_var.get()
+        except tk.TclError:
+            return  # the spinbox holds a half-typed value
+        if bucket_seconds <= 0 or top <= 0:
+            return
+        with STATS.span("module stats"):
+            bucket_seconds, _, entries = module_stats(
+                self.messages,
+                self.indexes,
+                self.start_timestamp,
+                self.end_timestamp,
+                bucket_seconds,
+                top,
+            )
+        self.gui.update_stats_window(bucket_seconds, entries)
+
+    def toggle_overlay(self):
+        # Spans are only recorded while someone is looking at them
+        STATS.enabled = self.gui.overlay_var.get()
+        if STATS.enabled:
+            self.refresh_overlay()
+        else:
+            self.gui.hide_overlay()
+
+    def refresh_overlay(self):
+        operation = STATS.last_operation()
+        text = STATS.format_operation(operation) if operation else "No updates yet"
+        spans = STATS.stats()["spans"]
+        if "parse" in spans:
+            parse = spans["parse"]
+            text += f"\nparse: {parse['rows_per_second']:,.0f} rows/s"
+        self.gui.show_overlay(text)
+
+    def toggle_profiling(self):
+        if self.gui.profile_var.get():
+            PROFILER.start()
+            return
+        pstats_path = filedialog.asksaveasfilename(
+            title="Save profile",
+            defaultextension=".pstats",
+            filetypes=[("Profile", "*.pstats")],
+        )
+        if not pstats_path:
+            self.gui.profile_var.set(True)  # keep capturing until saved
+            return
+        try:
+            snapshot_path = PROFILER.stop(pstats_path)
+            messagebox.showinfo(
+                "Profile saved", f"Saved {pstats_path}\nand {snapshot_path}"
+            )
+        except Exception as e:
+            print(f"Failed to save profile: {e}")
+
+    def select_histogram_range(self, start_fraction, end_fraction):
+        if end_fraction is None:
+            # A click selects the whole bucket under the cursor
+            histogram = self.indexes.histogram
+            bucket = histogram.bucket_of(
+                self.min_timestamp + start_fraction * self.time_span
+            )
+            start_time, end_time = histogram.bucket_range(bucket)
+        else:
+            start_time = self.min_timestamp + start_fraction * self.time_span
+            end_time = self.min_timestamp + end_fraction * self.time_span
+
+        # Moving the sliders runs the usual time filter path
+        self.gui.start_time_slider.set(
+            (start_time - self.min_timestamp) / self.time_span * 1000
+        )
+        self.gui.end_time_slider.set(
+            (end_time - self.min_timestamp) / self.time_span * 1000
+        )
 
     def update_start_time(self, value):
         self.log_parser.set_start_time(value)
@@ -173,7 +695,7 @@ class LogViewerApp:
 
     def update_start_time(self, val):
         try:
-            print(f"start pos {float(val)}, time span {self.time_span}")
+            STATS.count("slider events")
             self.start_pos = float(val)
             self.start_timestamp = (
                 self.min_timestamp + (self.start_pos / 1000) * self.time_span
@@ -189,21 +711,33 @@ class LogViewerApp:
             #         (msg["timestamp"] - self.min_timestamp) / self.time_span * 1000
             #     )
 
-            print(f"value sent to update start time display: {self.start_timestamp}")
             # Update the GUI component with the formatted timestamp
             self.gui.update_start_time_display(self.start_timestamp)
-            self.update_display()
+            self.schedule_display_update()
         except Exception as e:
             print(f"Error updating start time: {e}")
 
+    def schedule_display_update(self):
+        # A drag fires many slider events per frame; coalesce them so only
+        # the latest window is evaluated
+        if self.display_update_pending is None:
+            self.display_update_pending = self.root.after(
+                SLIDER_FRAME_MS, self.run_scheduled_display_update
+            )
+
+    def run_scheduled_display_update(self):
+        self.display_update_pending = None
+        self.update_display()
+
     def update_end_time(self, val):
         try:
+            STATS.count("slider events")
             self.end_pos = float(val)
             self.end_timestamp = (
                 self.min_timestamp + (self.end_pos / 1000) * self.time_span
             )
             self.gui.update_end_time_display(self.end_timestamp)
-            self.update_display()
+            self.schedule_display_update()
         except Exception as e:
             print(f"Error updating end time: {e}")
 
@@ -550,7 +1084,7 @@ class LogViewerApp:
 
     def save_message(self):
         # Ensure a message is selected
-        selection = self.log_tree.selection()
+        selection = self.gui.log_tree.selection()
         if not selection:
             messagebox.showinfo("Save Message", "Please select a message to save.")
             return
@@ -561,30 +1095,26 @@ class LogViewerApp:
         if not values:
             return
 
+        # Items are positions in the filtered rows; merged rows are saved
+        # against the file they came from
+        row = self.gui.log_table.rows[int(item_id)]
+        message_id = str(self.messages.ids[row])
+        log_file = self.messages.get_source(row) or self.current_log_file
+        if not log_file:
+            # Streamed rows are numbered per listening session, so there is
+            # no file to find them in again
+            messagebox.showerror(
+                "Save Message", "Messages received from a log stream cannot be saved."
+            )
+            return
+
         # Ask the user for a name for the saved message
         name = simpledialog.askstring("Save Message", "Enter a name for this message:")
         if not name:  # If no name is provided, do not save the message
             return
 
-        # Construct the saved message data
-        message_id = self.gui.log_tree.item(item_id, "tags")[0]
-        self.message_manager.save_message(
-            self.current_log_file, message_id, name, values
-        )
-        # saved_message = {
-        #     "log_file": self.current_log_file,  # Reference the current log file
-        #     "message_id": message_id,
-        #     "name": name,  # Add the name to the saved data
-        #     "details": values,
-        # }
-
-        # Save to a file or in-memory structure
-        saved_file = "saved_messages.txt"
-        with open(saved_file, "a") as f:
-            f.write(f"{saved_message}\n")
-
-        # Add to "Saved Messages" listbox
-        self.saved_messages_listbox.insert(tk.END, f"{name}: {values[3]}")
+        self.message_manager.save_message(log_file, message_id, name, values)
+        self.root.after(SAVED_MESSAGES_FLUSH_MS, self.message_manager.flush)
 
         messagebox.showinfo("Save Message", "Message saved successfully!")
 
@@ -597,7 +1127,11 @@ class LogViewerApp:
         saved_message = self.message_manager.get_saved_message(index)
         if saved_message:
             # Find and select the corresponding message in the Treeview
-            self.gui.select_message_in_log_tree(saved_message["message_id"])
+            row = self.messages.find_row(
+                int(saved_message["message_id"]), saved_message["log_file"]
+            )
+            if row is not None and row < self.rows_loaded:
+                self.gui.select_message_in_log_tree(row)
 
     def load_last_directory(self):
         try:
@@ -621,6 +1155,8 @@ class LogViewerApp:
 
     def run(self):
         self.root.mainloop()
+        self.stop_listening()
+        self.message_manager.close()
 
 
 if __name__ == "__main__":
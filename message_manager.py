@@ -1,14 +1,37 @@
-import os
 import ast
+import json
+import os
+import sqlite3
+
+FLUSH_BATCH = 100  # pending saves written in one transaction
+MIGRATION_BATCH = 1000
+SCHEMA_VERSION = 1  # stored in PRAGMA user_version once the text file is migrated
+
 
 class MessageManager:
-    def __init__(self, saved_messages_listbox):
+    """
+    Saved messages kept in a local SQLite database.
+
+    Rows are indexed by log file and message id, so loading the saved
+    messages of one log is an indexed query no matter how many are stored
+    for other logs. Saves are queued and written in batches by flush().
+    The legacy saved_messages.txt is imported once and left in place.
+    """
+
+    def __init__(self, saved_messages_listbox, database_file="saved_messages.db"):
         self.saved_messages_listbox = saved_messages_listbox
         self.saved_messages_file = "saved_messages.txt"
+        self.database_file = database_file
         self.saved_messages = []
         self.current_log_file = None
+        self._pending = []
+        self._connection = None
 
     def save_message(self, log_file, message_id, name, details):
+        # Saved messages are looked up by log file, so they need one
+        if not log_file:
+            raise ValueError("a saved message needs the log file it came from")
+
         # Create a dictionary to represent the saved message
         saved_message = {
             "log_file": log_file,
@@ -16,33 +39,163 @@ class MessageManager:
             "name": name,
             "details": details,
         }
-
-        # Save the message to a file
-        with open(self.saved_messages_file, "a") as f:
-            f.write(f"{saved_message}\n")
+        self._pending.append(saved_message)
+        if len(self._pending) >= FLUSH_BATCH:
+            self.flush()
 
         # Add to in-memory list and update the listbox
-        self.saved_messages.append(saved_message)
-        self.saved_messages_listbox.insert('end', f"{name}: {details[3]}")
+        if log_file == self.current_log_file:
+            self.saved_messages.append(saved_message)
+            self.saved_messages_listbox.insert("end", f"{name}: {details[3]}")
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            connection = self._connect()
+        except Exception as e:
+            # Keep them queued; the next flush tries again
+            print(f"Failed to write {len(pending)} saved messages: {e}")
+            self._pending = pending + self._pending
+            return
+        try:
+            with connection:
+                self._insert(connection, pending)
+            return
+        except Exception as e:
+            print(f"Failed to write saved messages: {e}")
+        # Write them one at a time so a bad one cannot hold back the rest
+        for saved_message in pending:
+            try:
+                with connection:
+                    self._insert(connection, [saved_message])
+            except Exception as e:
+                print(f"Dropped saved message {saved_message['name']!r}: {e}")
 
     def load_saved_messages(self, log_file):
-        self.saved_messages_listbox.delete(0, 'end')
+        self.flush()
+        self.saved_messages_listbox.delete(0, "end")
         self.saved_messages.clear()
         self.current_log_file = log_file
-
-        if not os.path.exists(self.saved_messages_file):
+        if log_file is None:
             return
 
-        with open(self.saved_messages_file, "r") as f:
-            for line in f:
-                saved_message = ast.literal_eval(line.strip())
-                if saved_message["log_file"] == log_file:
-                    self.saved_messages.append(saved_message)
-                    name = saved_message["name"]
-                    message_text = saved_message["details"][3]
-                    self.saved_messages_listbox.insert('end', f"{name}: {message_text}")
+        try:
+            rows = self._connect().execute(
+                "SELECT message_id, name, details FROM saved_messages"
+                " WHERE log_file = ? ORDER BY id",
+                (log_file,),
+            )
+            for message_id, name, details in rows:
+                self.saved_messages.append(
+                    {
+                        "log_file": log_file,
+                        "message_id": message_id,
+                        "name": name,
+                        "details": tuple(json.loads(details)),
+                    }
+                )
+        except Exception as e:
+            print(f"Failed to load saved messages: {e}")
+
+        labels = [
+            f"{saved_message['name']}: {saved_message['details'][3]}"
+            for saved_message in self.saved_messages
+        ]
+        if labels:
+            self.saved_messages_listbox.insert("end", *labels)
 
     def get_saved_message(self, index):
         if index < len(self.saved_messages):
             return self.saved_messages[index]
         return None
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self):
+        if self._connection is not None:
+            return self._connection
+        connection = sqlite3.connect(self.database_file)
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS saved_messages ("
+                " id INTEGER PRIMARY KEY,"
+                " log_file TEXT NOT NULL,"
+                " message_id TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " details TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS saved_messages_log_file"
+                " ON saved_messages (log_file, message_id)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS saved_messages_message_id"
+                " ON saved_messages (message_id)"
+            )
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version < SCHEMA_VERSION:
+            self._migrate_text_file(connection)
+        self._connection = connection
+        return connection
+
+    def _migrate_text_file(self, connection):
+        # One-time import of the old one-dict-per-line file, in the same
+        # transaction as the version bump; the file itself is kept as is
+        with connection:
+            batch = []
+            if os.path.exists(self.saved_messages_file):
+                with open(self.saved_messages_file, "r") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            saved_message = ast.literal_eval(line.strip())
+                        except (ValueError, SyntaxError) as e:
+                            print(f"Skipping unreadable saved message: {e}")
+                            continue
+                        if not _is_saved_message(saved_message):
+                            print(f"Skipping incomplete saved message: {line!r}")
+                            continue
+                        batch.append(saved_message)
+                        if len(batch) >= MIGRATION_BATCH:
+                            self._insert(connection, batch)
+                            batch = []
+            self._insert(connection, batch)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _insert(self, connection, saved_messages):
+        connection.executemany(
+            "INSERT INTO saved_messages (log_file, message_id, name, details)"
+            " VALUES (?, ?, ?, ?)",
+            (
+                (
+                    saved_message["log_file"],
+                    str(saved_message["message_id"]),
+                    saved_message["name"],
+                    json.dumps(list(saved_message["details"])),
+                )
+                for saved_message in saved_messages
+            ),
+        )
+
+
+def _is_saved_message(record):
+    # Whether a legacy record has everything _insert() and the listbox use
+    return (
+        isinstance(record, dict)
+        and all(key in record for key in ("log_file", "message_id", "name"))
+        and isinstance(record["log_file"], str)
+        and isinstance(record["name"], str)
+        and isinstance(record.get("details"), (list, tuple))
+        and len(record["details"]) > 3
+        and all(
+            isinstance(value, (str, int, float, type(None)))
+            for value in record["details"]
+        )
+    )
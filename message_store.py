@@ -0,0 +1,352 @@
+import io
+from array import array
+from bisect import bisect_left
+
+
+def join_continuation_lines(lines):
+    # Continuation lines are appended after a single space, newline included
+    return "".join(" " + line for line in lines)
+
+
+def decode_mapped_body(raw):
+    # Rebuild the text exactly as the line-by-line parser would: the first
+    # line loses its trailing whitespace and the rest are continuations
+    lines = io.StringIO(str(raw, "utf-8", "replace"), newline=None)
+    first_line = lines.readline().rstrip()
+    return first_line + join_continuation_lines(lines)
+
+
+class MessageStore:
+    """
+    Column-oriented storage for parsed log entries.
+
+    Every entry is spread over typed arrays (line id, timestamp, level code,
+    module code) and its body lives in one shared byte buffer addressed by
+    start/end offsets, so a row costs a few dozen bytes instead of a dict.
+
+    When built over a memory-mapped log file the offsets point straight into
+    the file and bodies are only decoded when a row is actually read. A store
+    merged from several mapped files also keeps a source code per row, which
+    picks the file its offsets refer to.
+    """
+
+    def __init__(self, mapped_source=None):
+        self.ids = array("q")
+        self.timestamps = array("d")
+        self.level_codes = array("B")
+        self.module_codes = array("H")
+        self.levels = []  # level code -> level name
+        self.modules = []  # module code -> module name
+        self._level_lookup = {}
+        self._module_lookup = {}
+        self._mapped = mapped_source is not None
+        self._body_buffer = mapped_source if self._mapped else bytearray()
+        self._body_starts = array("q")
+        self._body_ends = array("q")
+        self.sources = []  # source code -> file path, for merged stores
+        self.source_codes = array("B")
+        self._source_buffers = []
+        self._rows_by_source = []  # source code -> its rows, built on demand
+        self._rows_by_source_indexed = 0
+        self._time_range = None
+        self._time_range_rows = 0  # rows already folded into _time_range
+        self._readonly = False
+
+    @classmethod
+    def from_columns(
+        cls, columns, levels, modules, mapped_source=None, time_range=None
+    ):
+        """
+        Rebuild a store around existing column buffers (arrays or typed
+        memoryviews) without copying them. Read-only buffers are turned into
+        arrays the first time a row is appended.
+        """
+        messages = cls(mapped_source)
+        messages.ids = columns["ids"]
+        messages.timestamps = columns["timestamps"]
+        messages.level_codes = columns["level_codes"]
+        messages.module_codes = columns["module_codes"]
+        messages._body_starts = columns["body_starts"]
+        messages._body_ends = columns["body_ends"]
+        if mapped_source is None:
+            messages._body_buffer = columns["bodies"]
+        for level in levels:
+            messages._intern(level, messages.levels, messages._level_lookup)
+        for module in modules:
+            messages._intern(module, messages.modules, messages._module_lookup)
+        messages._time_range = time_range
+        messages._time_range_rows = len(messages.timestamps) if time_range else 0
+        messages._readonly = any(
+            isinstance(column, memoryview) for column in columns.values()
+        )
+        return messages
+
+    @property
+    def is_mapped(self):
+        return self._mapped
+
+    @property
+    def mapped_source(self):
+        return self._body_buffer if self._mapped else None
+
+    @property
+    def is_merged(self):
+        return bool(self.sources)
+
+    def add_source(self, file_path, buffer):
+        """
+        Register a mapped file for a merged store and return its source code.
+        Rows appended with append_span() must then be followed by their
+        source code in `source_codes`.
+        """
+        self._mapped = True
+        self._body_buffer = None
+        self._source_buffers.append(buffer)
+        code = self._intern(file_path, self.sources, {})
+        self.source_codes = self._widen(self.source_codes, code)
+        return code
+
+    def replace_mapping(self, buffer):
+        # Swap in a longer mapping of the same file once it has grown. The
+        # old one is not closed: index threads may still be slicing it, and
+        # it is unmapped when the last of them drops its reference.
+        self._body_buffer = buffer
+
+    def columns(self):
+        columns = {
+            "ids": self.ids,
+            "timestamps": self.timestamps,
+            "level_codes": self.level_codes,
+            "module_codes": self.module_codes,
+            "body_starts": self._body_starts,
+            "body_ends": self._body_ends,
+        }
+        if not self._mapped:
+            columns["bodies"] = self._body_buffer
+        return columns
+
+    def embedded_columns(self):
+        """
+        Return columns() as an unmapped store would have them, with the
+        decoded bodies copied into a "bodies" column. Used to cache logs
+        whose mapped source is costly to reopen.
+        """
+        bodies = bytearray()
+        body_starts = array("q")
+        body_ends = array("q")
+        for row in range(len(self)):
+            body_starts.append(len(bodies))
+            bodies += self.get_message(row).encode("utf-8")
+            body_ends.append(len(bodies))
+        columns = self.columns()
+        columns.update(body_starts=body_starts, body_ends=body_ends, bodies=bodies)
+        return columns
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, line_id, timestamp, level, module, message):
+        if self._readonly:
+            self._thaw()
+        body = message.encode("utf-8")
+        start = len(self._body_buffer)
+        self._body_buffer += body
+        self.append_span(line_id, timestamp, level, module, start, start + len(body))
+
+    def append_span(self, line_id, timestamp, level, module, body_start, body_end):
+        if self._readonly:
+            self._thaw()
+        level_code = self._level_lookup.get(level)
+        if level_code is None:
+            level_code = self._level_code(level)
+        module_code = self._module_lookup.get(module)
+        if module_code is None:
+            module_code = self._module_code(module)
+
+        self.ids.append(line_id)
+        self.timestamps.append(timestamp)
+        self.level_codes.append(level_code)
+        self.module_codes.append(module_code)
+        self._body_starts.append(body_start)
+        self._body_ends.append(body_end)
+
+    def extend_columns(self, columns, levels, modules, line_offset=0):
+        """
+        Append the rows of another store's columns, remapping its level and
+        module codes onto this store's vocabularies and shifting its line
+        ids by `line_offset`.
+        """
+        if self._readonly:
+            self._thaw()
+        level_map = [self._level_code(level) for level in levels]
+        module_map = [self._module_code(module) for module in modules]
+
+        starts, ends = columns["body_starts"], columns["body_ends"]
+        if not self._mapped:
+            shift = len(self._body_buffer)
+            self._body_buffer += columns["bodies"]
+            starts = map(shift.__add__, starts)
+            ends = map(shift.__add__, ends)
+
+        self.ids.extend(map(line_offset.__add__, columns["ids"]))
+        self.timestamps.extend(columns["timestamps"])
+        self.level_codes.extend(map(level_map.__getitem__, columns["level_codes"]))
+        self.module_codes.extend(map(module_map.__getitem__, columns["module_codes"]))
+        self._body_starts.extend(starts)
+        self._body_ends.extend(ends)
+
+    def extend_last_message(self, text):
+        # Continuation lines always belong to the newest entry, whose body
+        # sits at the end of the buffer, so it can grow in place
+        if not self.ids:
+            return
+        if self._readonly:
+            self._thaw()
+        self._body_buffer += text.encode("utf-8")
+        self._body_ends[-1] = len(self._body_buffer)
+
+    def extend_last_span(self, body_end):
+        if self.ids:
+            if self._readonly:
+                self._thaw()
+            self._body_ends[-1] = body_end
+
+    def last_span(self):
+        if not self.ids:
+            return None
+        return self._body_starts[-1], self._body_ends[-1]
+
+    def get_message(self, row):
+        if self.source_codes:
+            buffer = self._source_buffers[self.source_codes[row]]
+        else:
+            buffer = self._body_buffer
+        raw = buffer[self._body_starts[row] : self._body_ends[row]]
+        if self._mapped:
+            return decode_mapped_body(raw)
+        return str(raw, "utf-8", "replace")
+
+    def get_level(self, row):
+        return self.levels[self.level_codes[row]]
+
+    def get_module(self, row):
+        return self.modules[self.module_codes[row]]
+
+    def get_source(self, row):
+        if not self.source_codes:
+            return ""
+        return self.sources[self.source_codes[row]]
+
+    def find_row(self, line_id, source=None):
+        """
+        Return the row of the entry with line id `line_id`, from the file
+        `source` in a merged store, or None if there is no such entry.
+        Line ids grow with the row within a file, so this is a binary search.
+        """
+        if self.source_codes:
+            if source not in self.sources:
+                return None
+            rows = self._source_rows(self.sources.index(source))
+        else:
+            rows = range(len(self.ids))
+        position = bisect_left(rows, line_id, key=self.ids.__getitem__)
+        if position < len(rows) and self.ids[rows[position]] == line_id:
+            return rows[position]
+        return None
+
+    def get_time_range(self):
+        # Only the rows appended since the last call are scanned
+        rows = len(self.timestamps)
+        if self._time_range_rows < rows:
+            new_timestamps = self.timestamps[self._time_range_rows : rows]
+            low, high = min(new_timestamps), max(new_timestamps)
+            if self._time_range is not None:
+                low = min(low, self._time_range[0])
+                high = max(high, self._time_range[1])
+            self._time_range = (low, high)
+            self._time_range_rows = rows
+        if self._time_range is None:
+            raise ValueError("no messages to take a time range from")
+        return self._time_range
+
+    def as_dict(self, row):
+        """
+        Build the legacy per-row dict view. Only for callers that still
+        need it; the columns should be read directly everywhere else.
+        """
+        return {
+            "id": self.ids[row],
+            "timestamp": self.timestamps[row],
+            "level": self.get_level(row),
+            "module": self.get_module(row),
+            "message": self.get_message(row),
+        }
+
+    def iter_dicts(self, rows=None):
+        if rows is None:
+            rows = range(len(self))
+        for row in rows:
+            yield self.as_dict(row)
+
+    def _source_rows(self, code):
+        # Split the rows appended since the last call by source
+        rows_by_source = self._rows_by_source
+        while len(rows_by_source) < len(self.sources):
+            rows_by_source.append(array("q"))
+        start = self._rows_by_source_indexed
+        end = len(self.source_codes)
+        for row, source_code in zip(range(start, end), self.source_codes[start:end]):
+            rows_by_source[source_code].append(row)
+        self._rows_by_source_indexed = end
+        return rows_by_source[code]
+
+    def close(self):
+        for buffer in self._source_buffers:
+            buffer.close()
+        if self._mapped and self._body_buffer is not None:
+            self._body_buffer.close()
+
+    def _thaw(self):
+        # Copy memoryview-backed columns into growable arrays
+        for name in (
+            "ids",
+            "timestamps",
+            "level_codes",
+            "module_codes",
+            "_body_starts",
+            "_body_ends",
+        ):
+            column = getattr(self, name)
+            if isinstance(column, memoryview):
+                thawed = array(column.format)
+                thawed.frombytes(column.cast("B"))
+                setattr(self, name, thawed)
+        if not self._mapped and isinstance(self._body_buffer, memoryview):
+            self._body_buffer = bytearray(self._body_buffer)
+        self._readonly = False
+
+    def _level_code(self, level):
+        level_code = self._level_lookup.get(level)
+        if level_code is None:
+            level_code = self._intern(level, self.levels, self._level_lookup)
+            self.level_codes = self._widen(self.level_codes, level_code)
+        return level_code
+
+    def _module_code(self, module):
+        module_code = self._module_lookup.get(module)
+        if module_code is None:
+            module_code = self._intern(module, self.modules, self._module_lookup)
+            self.module_codes = self._widen(self.module_codes, module_code)
+        return module_code
+
+    def _intern(self, value, names, lookup):
+        code = len(names)
+        names.append(value)
+        lookup[value] = code
+        return code
+
+    def _widen(self, codes, code):
+        # Switch to a larger item size once the vocabulary outgrows the array
+        if code < 1 << (8 * codes.itemsize):
+            return codes
+        return array("I", codes)
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from compressed_log import is_compressed
+from message_store import MessageStore
+
+CACHE_MAGIC = b"LOGIDX01"
+HEADER_SIZE = struct.Struct("<Q")
+FINGERPRINT_BLOCK = 64 * 1024  # bytes hashed from each end of the log
+COLUMN_ALIGNMENT = 8
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed logs, one binary file per log.
+
+    A cache file holds a JSON header (source fingerprint, level/module
+    vocabularies, time range and column layout) followed by the raw column
+    arrays, each aligned so it can be viewed in place through a memory map.
+    The least recently used files are evicted once the directory grows past
+    its size budget. Compressed logs are cached with their decoded bodies so
+    reopening them never has to decompress the source again.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=1024**3):
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.expanduser("~"), ".cache", "log_parser"
+        )
+        self.max_bytes = max_bytes
+
+    def load(self, log_file):
+        cache_file = self._cache_path(log_file)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header = self._read_header(mapping)
+            if header is None or header["fingerprint"] != self.fingerprint(log_file):
+                mapping.close()
+                return None
+
+            view = memoryview(mapping)
+            columns = {}
+            for name, typecode, offset, nbytes in header["columns"]:
+                start = header["data_start"] + offset
+                columns[name] = view[start : start + nbytes].cast(typecode)
+
+            mapped_source = None
+            if header["mapped"]:
+                # Also without rows: follow mode extends this mapping
+                with open(log_file, "rb") as f:
+                    mapped_source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            # Touch the file so eviction sees it as recently used
+            os.utime(cache_file)
+            return MessageStore.from_columns(
+                columns,
+                header["levels"],
+                header["modules"],
+                mapped_source=mapped_source,
+                time_range=tuple(header["time_range"])
+                if header["time_range"]
+                else None,
+            )
+        except Exception as e:
+            print(f"Failed to load parse cache: {e}")
+            return None
+
+    def save(self, log_file, messages):
+        cache_file = self._cache_path(log_file)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            mapped = messages.is_mapped
+            if mapped and is_compressed(log_file):
+                if len(messages.mapped_source) > self.max_bytes:
+                    return  # the bodies alone would blow the cache budget
+                columns = messages.embedded_columns()
+                mapped = False
+            else:
+                columns = messages.columns()
+
+            # Column offsets are relative to the start of the data section
+            layout = []
+            offset = 0
+            for name, column in columns.items():
+                data = memoryview(column)
+                layout.append((name, data.format, offset, data.nbytes))
+                offset = self._align(offset + data.nbytes)
+
+            header = {
+                "source": os.path.abspath(log_file),
+                "fingerprint": self.fingerprint(log_file),
+                "mapped": mapped,
+                "rows": len(messages),
+                "levels": messages.levels,
+                "modules": messages.modules,
+                "time_range": messages.get_time_range() if len(messages) else None,
+                "columns": layout,
+            }
+            header_bytes = json.dumps(header).encode("utf-8")
+
+            temp_file = cache_file + ".tmp"
+            with open(temp_file, "wb") as f:
+                f.write(CACHE_MAGIC)
+                f.write(HEADER_SIZE.pack(len(header_bytes)))
+                f.write(header_bytes)
+                data_start = self._align(f.tell())
+                for column, (_, _, column_offset, _) in zip(columns.values(), layout):
+                    f.write(b"\0" * (data_start + column_offset - f.tell()))
+                    f.write(column)
+            os.replace(temp_file, cache_file)
+            self.evict()
+        except Exception as e:
+            print(f"Failed to write parse cache: {e}")
+
+    def evict(self):
+        """
+        Delete least recently used cache files until the directory fits in
+        the size budget.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".idx") and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"Failed to evict cache file {path}: {e}")
+
+    def fingerprint(self, log_file):
+        stat = os.stat(log_file)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(log_file, "rb") as f:
+            digest.update(f.read(FINGERPRINT_BLOCK))
+            if stat.st_size > FINGERPRINT_BLOCK:
+                f.seek(max(FINGERPRINT_BLOCK, stat.st_size - FINGERPRINT_BLOCK))
+                digest.update(f.read(FINGERPRINT_BLOCK))
+        return [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+
+    def _cache_path(self, log_file):
+        key = hashlib.sha1(os.path.abspath(log_file).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".idx")
+
+    def _read_header(self, mapping):
+        prefix = len(CACHE_MAGIC) + HEADER_SIZE.size
+        if len(mapping) < prefix or mapping[: len(CACHE_MAGIC)] != CACHE_MAGIC:
+            return None
+        (header_size,) = HEADER_SIZE.unpack(mapping[len(CACHE_MAGIC) : prefix])
+        header = json.loads(mapping[prefix : prefix + header_size])
+        header["data_start"] = self._align(prefix + header_size)
+        return header
+
+    def _align(self, offset):
+        return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
@@ -0,0 +1,246 @@
+import operator
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+from perf_stats import STATS
+
+TRAJECTORY_MODULE = "TrajectoryGenerator"
+SEGMENT_FIELDS = (
+    "start_x",
+    "start_y",
+    "start_z",
+    "end_x",
+    "end_y",
+    "end_z",
+    "intermediate_x",
+    "intermediate_y",
+    "intermediate_z",
+    "heading",
+)
+PHASE_FIELDS = ("initial_velocity", "desired_acceleration", "duration")
+CACHED_CONDITIONS = 16
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[-+]?(?:nan|inf))"
+POINT_PATTERN = re.compile(
+    r"(Start|End|Intermediate) point: \{x = %s, y = %s, z = %s\}"
+    % (NUMBER, NUMBER, NUMBER)
+)
+HEADING_PATTERN = re.compile(r"Heading: " + NUMBER)
+PHASE_PATTERN = re.compile(
+    r"Initial velocity: %s, Desired acceleration: %s, Duration: %s seconds"
+    % (NUMBER, NUMBER, NUMBER)
+)
+CONDITION_PATTERN = re.compile(
+    r"\s*([A-Za-z][A-Za-z_ .]*?)\s*(<=|>=|==|!=|<|>|=)\s*"
+    + NUMBER
+    + r"\s*[A-Za-z/]*\s*"
+)
+
+
+def parse_trajectory(message):
+    """
+    Pull the numbers out of a "Trajectory generated: {{Segment: ...}}"
+    message. Returns (segments, phases): one tuple of SEGMENT_FIELDS values
+    per segment and one (segment, *PHASE_FIELDS) tuple per velocity profile
+    entry. Fields missing from a segment are NaN.
+    """
+    segments, phases = [], []
+    for number, text in enumerate(message.split("{Segment: ")[1:]):
+        values = dict.fromkeys(SEGMENT_FIELDS, float("nan"))
+        for name, x, y, z in POINT_PATTERN.findall(text):
+            name = name.lower()
+            values[name + "_x"] = float(x)
+            values[name + "_y"] = float(y)
+            values[name + "_z"] = float(z)
+        heading = HEADING_PATTERN.search(text)
+        if heading:
+            values["heading"] = float(heading.group(1))
+        segments.append(tuple(values[field] for field in SEGMENT_FIELDS))
+        for phase in PHASE_PATTERN.findall(text):
+            phases.append((number, *map(float, phase)))
+    return segments, phases
+
+
+def parse_conditions(text):
+    """
+    Read payload filters such as "Duration > 1000 s" or
+    "start z < 1990 and heading >= 0" into (field, operator, value) tuples.
+    Units after the number are ignored. Raises ValueError for anything it
+    does not understand.
+    """
+    conditions = []
+    for part in re.split(r"\band\b|,", text, flags=re.I):
+        match = CONDITION_PATTERN.fullmatch(part)
+        if not match:
+            raise ValueError(f"unrecognised payload filter: {part.strip()!r}")
+        name, symbol, value = match.groups()
+        field = re.sub(r"[\s.]+", "_", name.strip().lower()).replace("_point", "")
+        if field not in SEGMENT_FIELDS and field not in PHASE_FIELDS:
+            raise ValueError(f"unknown payload field: {name.strip()!r}")
+        conditions.append((field, OPERATORS[symbol], float(value)))
+    return conditions
+
+
+def payload_matches(message, conditions):
+    # Streaming counterpart of PayloadIndex.select for a single message:
+    # every condition must hold for at least one segment or profile entry
+    segments, phases = parse_trajectory(message)
+    for field, compare, value in conditions:
+        if field in PHASE_FIELDS:
+            column = PHASE_FIELDS.index(field) + 1
+            entries = phases
+        else:
+            column = SEGMENT_FIELDS.index(field)
+            entries = segments
+        if not any(compare(entry[column], value) for entry in entries):
+            return False
+    return True
+
+
+class PayloadIndex:
+    """
+    Numeric columns extracted from the TrajectoryGenerator messages.
+
+    Segments and velocity profile entries get one array("d") per field plus
+    a column naming the store row they came from, so a range filter such as
+    "Duration > 1000" is one pass over a column instead of a regex over
+    every body. Extraction starts the first time a payload filter is used
+    and runs on a worker thread, walking the module's posting list in the
+    filter index so other modules' rows are never touched.
+
+    The rows matching each condition are kept as per-row flags and only
+    brought up to date with the entries extracted since the last filter.
+    """
+
+    def __init__(self, messages, filter_index, module=TRAJECTORY_MODULE):
+        self.messages = messages
+        self.filter_index = filter_index
+        self.module = module
+        self.segment_rows = array("q")
+        self.segment_columns = {field: array("d") for field in SEGMENT_FIELDS}
+        self.phase_rows = array("q")
+        self.phase_segments = array("I")
+        self.phase_columns = {field: array("d") for field in PHASE_FIELDS}
+        # (rows extracted, segments, profile entries), replaced as a whole
+        # so a reader never sees a row's entries half written
+        self._state = (0, 0, 0)
+        self._matches = {}  # condition -> [entries checked, row flags]
+        self._cancel_event = threading.Event()
+        self._thread = None
+
+    @property
+    def rows_indexed(self):
+        return self._state[0]
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def build_in_background(self, row_end=None):
+        if self.building:
+            return
+        self._thread = threading.Thread(
+            target=self.extend, args=(row_end,), daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        # Returns the worker if it is still running; it stops at the next row
+        self._cancel_event.set()
+        return [self._thread] if self.building else []
+
+    def extend(self, row_end=None):
+        """
+        Extract the module's rows below `row_end` that are not in yet.
+        """
+        rows_indexed = self.filter_index.rows_indexed
+        row_end = rows_indexed if row_end is None else min(row_end, rows_indexed)
+        start = self.rows_indexed
+        if row_end <= start:
+            return
+        try:
+            code = self.messages.modules.index(self.module)
+        except ValueError:
+            code = len(self.filter_index.module_rows)  # no such module (yet)
+        if code >= len(self.filter_index.module_rows):
+            self._state = (row_end, *self._state[1:])
+            return
+        posting = self.filter_index.module_rows[code]
+        get_message = self.messages.get_message
+        segment_rows, phase_rows = self.segment_rows, self.phase_rows
+        segment_columns = [self.segment_columns[field] for field in SEGMENT_FIELDS]
+        phase_columns = [self.phase_columns[field] for field in PHASE_FIELDS]
+        with STATS.span("payload index") as span:
+            for position in range(
+                bisect_left(posting, start), bisect_left(posting, row_end)
+            ):
+                if self._cancel_event.is_set():
+                    return
+                row = posting[position]
+                segments, phases = parse_trajectory(get_message(row))
+                for segment in segments:
+                    segment_rows.append(row)
+                    for column, value in zip(segment_columns, segment):
+                        column.append(value)
+                for number, *values in phases:
+                    phase_rows.append(row)
+                    self.phase_segments.append(number)
+                    for column, value in zip(phase_columns, values):
+                        column.append(value)
+                self._state = (row + 1, len(segment_rows), len(phase_rows))
+                span.add_rows(1)
+        self._state = (row_end, len(segment_rows), len(phase_rows))
+
+    def select(self, conditions, rows):
+        """
+        Keep the rows of the sorted `rows` that satisfy every condition from
+        parse_conditions(); rows of other modules never match. Rows not
+        extracted yet are left out while the worker thread catches up.
+        """
+        if not conditions:
+            return rows
+        state = self._state
+        if state[0] < self.filter_index.rows_indexed:
+            self.build_in_background()
+        rows = rows[: bisect_left(rows, state[0])]
+        for condition in conditions:
+            flags = self._matching_flags(condition, state)
+            rows = array("q", compress(rows, map(flags.__getitem__, rows)))
+        return rows
+
+    def _matching_flags(self, condition, state):
+        # Per-row flags for one condition, updated with new entries only
+        field, compare, value = condition
+        rows_indexed, segment_count, phase_count = state
+        if field in PHASE_FIELDS:
+            entry_rows, column = self.phase_rows, self.phase_columns[field]
+            count = phase_count
+        else:
+            entry_rows, column = self.segment_rows, self.segment_columns[field]
+            count = segment_count
+        cached = self._matches.pop(condition, None)
+        if cached is None:
+            if len(self._matches) >= CACHED_CONDITIONS:
+                self._matches.pop(next(iter(self._matches)))
+            cached = [0, bytearray()]
+        self._matches[condition] = cached  # most recently used last
+        checked, flags = cached
+        if len(flags) < rows_indexed:
+            flags.extend(bytes(rows_indexed - len(flags)))
+        for entry in range(checked, count):
+            if compare(column[entry], value):
+                flags[entry_rows[entry]] = 1
+        cached[0] = max(checked, count)
+        return flags
@@ -0,0 +1,219 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+SPAN_HISTORY = 32  # operations kept for the overlay and stats()
+# cProfile hooks every thread from 3.12 on (sys.monitoring)
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class _NullSpan:
+    # Shared do-nothing context manager returned while stats are disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_rows(self, rows):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, stats, name, rows):
+        self.stats = stats
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats._record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+    def add_rows(self, rows):
+        self.rows += rows
+
+
+class PerfStats:
+    """
+    Timing spans and counters for the hot paths (parse, index build,
+    filter, render).
+
+    Spans are timed with perf_counter and summed per name; spans on the UI
+    thread that run inside operation() also make up that operation's
+    breakdown, which the overlay shows. While disabled, span() hands back
+    one shared no-op context manager, so instrumented code pays a method
+    call per span and nothing per row. Spans wrap batches, never single
+    lines; the Profiler gives the per-function view (regex versus strptime).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.totals = {}  # span name -> [calls, seconds, rows]
+        self.counters = {}
+        self.operations = []  # (name, seconds, [(span, seconds, rows)])
+        self._lock = threading.Lock()  # the loader records from its thread
+        self._operation = None
+        self._ui_thread = threading.main_thread()
+
+    def span(self, name, rows=0):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, rows)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def operation(self, name):
+        """
+        Group the spans of one user-visible operation, e.g. a display update.
+        """
+        if not self.enabled or self._operation is not None:
+            yield
+            return
+        self._operation = []
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            spans, self._operation = self._operation, None
+            with self._lock:
+                self.operations.append((name, time.perf_counter() - start, spans))
+                del self.operations[:-SPAN_HISTORY]
+
+    def last_operation(self):
+        return self.operations[-1] if self.operations else None
+
+    def stats(self):
+        """
+        Return a snapshot: totals per span with rows per second, counters
+        and the most recent operations.
+        """
+        with self._lock:
+            spans = {
+                name: {
+                    "calls": calls,
+                    "seconds": seconds,
+                    "rows": rows,
+                    "rows_per_second": rows / seconds if seconds else 0.0,
+                }
+                for name, (calls, seconds, rows) in self.totals.items()
+            }
+            return {
+                "spans": spans,
+                "counters": dict(self.counters),
+                "operations": list(self.operations),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.totals.clear()
+            self.counters.clear()
+            self.operations.clear()
+
+    def format_operation(self, operation):
+        name, seconds, spans = operation
+        parts = [f"{name}: {seconds * 1000:.1f} ms"]
+        for span, span_seconds, rows in spans:
+            part = f"{span} {span_seconds * 1000:.1f} ms"
+            if rows and span_seconds:
+                part += f" ({rows} rows, {rows / span_seconds:,.0f} rows/s)"
+            parts.append(part)
+        return " | ".join(parts)
+
+    def _record(self, name, seconds, rows):
+        with self._lock:
+            total = self.totals.get(name)
+            if total is None:
+                total = self.totals[name] = [0, 0.0, 0]
+            total[0] += 1
+            total[1] += seconds
+            total[2] += rows
+        operation = self._operation
+        if operation is not None and threading.current_thread() is self._ui_thread:
+            operation.append((name, seconds, rows))
+
+
+class Profiler:
+    """
+    On-demand cProfile and tracemalloc capture, saved as a .pstats file and
+    a tracemalloc snapshot next to it.
+
+    Before Python 3.12 cProfile only sees the thread that enabled it, so
+    worker threads wrap their batches in profile_thread() to be included
+    while a capture runs. From 3.12 the capture already covers every thread
+    and a second profiler cannot be enabled, so profile_thread() does
+    nothing there.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        import cProfile
+        import tracemalloc
+
+        tracemalloc.start()
+        profile = cProfile.Profile()
+        self._profiles = [profile]
+        self.running = True
+        profile.enable()
+
+    @contextmanager
+    def profile_thread(self):
+        if not self.running or PROFILES_ALL_THREADS:
+            yield
+            return
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Profiling must never break the work it measures
+            print(f"Failed to profile worker thread: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def stop(self, pstats_path):
+        """
+        Stop profiling and write `pstats_path` plus a tracemalloc snapshot
+        in `pstats_path` + ".tracemalloc". Returns the snapshot path.
+        """
+        import pstats
+        import tracemalloc
+
+        self.running = False
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+        profiles[0].disable()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(pstats_path)
+        snapshot_path = pstats_path + ".tracemalloc"
+        tracemalloc.take_snapshot().dump(snapshot_path)
+        tracemalloc.stop()
+        return snapshot_path
+
+
+STATS = PerfStats()
+PROFILER = Profiler()
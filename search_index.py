@@ -0,0 +1,276 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+from perf_stats import STATS
+
+BLOCK_SHIFT = 6  # postings point at blocks of 64 consecutive rows
+REGEX_METACHARACTERS = set(".^$*+?{}[]\\|()")
+OPTIONAL_QUANTIFIERS = set("?*{")
+SEARCH_SYNC_ROWS = 20000  # more unconfirmed rows than this go to a worker thread
+CONFIRM_ROWS = 8192  # rows confirmed between progress updates on the worker
+CACHED_QUERIES = 8
+
+
+def required_literals(pattern):
+    """
+    Return substrings every match of the regex `pattern` must contain.
+
+    Conservative: groups and character classes are skipped, a character
+    followed by ?, * or {..} is treated as optional and top-level
+    alternation drops every requirement.
+    """
+    if re.compile(pattern).flags & re.VERBOSE:
+        return []  # whitespace in the pattern is not literal
+    literals = []
+    current = []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if not escaped.isalnum():
+                literal = escaped
+            i += 2
+        elif char == "[":
+            # Skip the class, honouring a leading ] and escapes inside it
+            i += 2 if pattern[i + 1 : i + 2] == "]" else 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char == "{":
+            # Skip the repeat count of a {m,n} quantifier
+            close = pattern.find("}", i)
+            i = len(pattern) if close == -1 else close + 1
+        elif char == "(":
+            depth += 1
+            i += 1
+        elif char == ")":
+            depth -= 1
+            i += 1
+        elif char == "|" and depth == 0:
+            return []
+        else:
+            if depth == 0 and char not in REGEX_METACHARACTERS:
+                literal = char
+            i += 1
+
+        optional = i < len(pattern) and pattern[i] in OPTIONAL_QUANTIFIERS
+        if literal is not None and depth == 0 and not optional:
+            current.append(literal)
+        else:
+            if current:
+                literals.append("".join(current))
+            current = []
+    if current:
+        literals.append("".join(current))
+    return literals
+
+
+def trigrams(text):
+    # Character triples; zipping shifted copies is much faster than slicing
+    return set(zip(text, text[1:], text[2:]))
+
+
+class _QueryMatches:
+    # The rows of the store matching one query, confirmed below rows_checked
+    def __init__(self, matcher, grams):
+        self.matcher = matcher
+        self.grams = grams
+        self.flags = bytearray()  # row -> 1 if it matches
+        self.rows_checked = 0
+
+
+class TrigramIndex:
+    """
+    Lower-cased trigram index over message bodies.
+
+    Postings hold 64-row block numbers instead of rows, which keeps the
+    index a fraction of the text size. A query narrows the rows to the
+    blocks containing every trigram of its required literals, then confirms
+    the remaining rows with the regex. Rows the background build has not
+    reached yet are always treated as candidates.
+
+    Confirmed matches are cached per query over the whole store, so a
+    repeated search only runs the regex on rows appended since.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.postings = {}  # trigram -> sorted block numbers
+        self.rows_indexed = 0
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._queries = {}  # (query, regex) -> _QueryMatches, oldest first
+        self._confirming = None  # the _QueryMatches the worker is confirming
+        self._confirm_cancel = threading.Event()
+        self._confirm_thread = None
+
+    def build_in_background(self, row_end=None):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self.extend, args=(row_end,), daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        # Returns the workers still running; they stop at the next row
+        self._cancel_event.set()
+        self._confirm_cancel.set()
+        return [
+            thread
+            for thread in (self._thread, self._confirm_thread)
+            if thread is not None and thread.is_alive()
+        ]
+
+    def extend(self, row_end=None):
+        """
+        Index the complete blocks below `row_end`. Rows of a trailing
+        partial block stay unindexed until the block fills up, and so does
+        the newest row, whose body can still grow while a file is followed.
+        """
+        messages = self.messages
+        row_end = min(len(messages) - 1, len(messages) if row_end is None else row_end)
+        with STATS.span("search index") as span:
+            self._index_blocks(row_end, span)
+
+    def _index_blocks(self, row_end, span):
+        messages = self.messages
+        block_rows = 1 << BLOCK_SHIFT
+        postings = self.postings
+        while self.rows_indexed + block_rows <= row_end:
+            if self._cancel_event.is_set():
+                return
+            start = self.rows_indexed
+            block = start >> BLOCK_SHIFT
+            text = "\n".join(
+                messages.get_message(row) for row in range(start, start + block_rows)
+            )
+            for gram in trigrams(text.lower()):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("I")
+                posting.append(block)
+            self.rows_indexed = start + block_rows
+            span.add_rows(block_rows)
+
+    def search(self, query, rows, regex=False):
+        """
+        Return (matching rows, complete) for the sorted `rows` whose message
+        matches `query`, as a case-insensitive substring or, with `regex`, a
+        regular expression.
+
+        When more than SEARCH_SYNC_ROWS rows are left to confirm, they are
+        confirmed on a worker thread and the rows confirmed so far come back
+        with `complete` False; search again to pick up the rest.
+        """
+        matches = self._matches_for(query, regex)
+        # The newest row can still grow while a file is followed, so it is
+        # confirmed on every search instead of cached
+        row_end = min(len(self.messages) - 1, rows[-1] + 1) if len(rows) else 0
+        unchecked = row_end - matches.rows_checked
+        if 0 < unchecked <= SEARCH_SYNC_ROWS and self._confirming is not matches:
+            self._confirm(matches, row_end)  # rows appended since the last search
+
+        checked = matches.rows_checked
+        split = bisect_left(rows, checked)
+        head = rows[:split]
+        found = array("q", compress(head, map(matches.flags.__getitem__, head)))
+        rest = self._candidates(self._pruning(matches.grams), rows[split:])
+        if checked < row_end:
+            self._confirm_in_background(matches, row_end)
+            if len(rest) > SEARCH_SYNC_ROWS:
+                return found, False
+        get_message = self.messages.get_message
+        search = matches.matcher.search
+        found.extend(row for row in rest if search(get_message(row)))
+        return found, True
+
+    def _matches_for(self, query, regex):
+        key = (query, regex)
+        matches = self._queries.pop(key, None)
+        if matches is None:
+            if regex:
+                matcher = re.compile(query)
+                literals = required_literals(query)
+            else:
+                matcher = re.compile(re.escape(query), re.IGNORECASE)
+                literals = [query]
+            grams = set()
+            for literal in literals:
+                grams.update(trigrams(literal.lower()))
+            matches = _QueryMatches(matcher, grams)
+            if len(self._queries) >= CACHED_QUERIES:
+                self._queries.pop(next(iter(self._queries)))
+        self._queries[key] = matches  # most recently used last
+        return matches
+
+    def _pruning(self, grams):
+        # (rows indexed, blocks holding every trigram), or None to keep all
+        if not grams:
+            return None
+        indexed = self.rows_indexed  # read first: these blocks are complete
+        return indexed, self._blocks_with(grams)
+
+    def _candidates(self, pruning, rows):
+        # The rows the index cannot rule out
+        if pruning is None:
+            return rows
+        indexed, blocks = pruning
+        return [row for row in rows if row >= indexed or (row >> BLOCK_SHIFT) in blocks]
+
+    def _confirm_in_background(self, matches, row_end):
+        if self._confirm_thread is not None and self._confirm_thread.is_alive():
+            if self._confirming is matches:
+                return
+            self._confirm_cancel.set()
+            self._confirm_thread.join()
+        self._confirming = matches
+        self._confirm_cancel = threading.Event()
+        self._confirm_thread = threading.Thread(
+            target=self._confirm,
+            args=(matches, row_end, self._confirm_cancel),
+            daemon=True,
+        )
+        self._confirm_thread.start()
+
+    def _confirm(self, matches, row_end, cancel_event=None):
+        # Run the regex over the candidate rows from rows_checked to row_end
+        get_message = self.messages.get_message
+        search = matches.matcher.search
+        flags = matches.flags
+        pruning = self._pruning(matches.grams)
+        with STATS.span("search confirm") as span:
+            while matches.rows_checked < row_end:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                start = matches.rows_checked
+                end = min(start + CONFIRM_ROWS, row_end)
+                flags.extend(bytes(end - start))
+                for row in self._candidates(pruning, range(start, end)):
+                    if search(get_message(row)):
+                        flags[row] = 1
+                matches.rows_checked = end
+                span.add_rows(end - start)
+        if self._confirming is matches:
+            self._confirming = None
+
+    def _blocks_with(self, grams):
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        blocks = set(postings[0])
+        for posting in postings[1:]:
+            blocks.intersection_update(posting)
+            if not blocks:
+                break
+        return blocks
@@ -0,0 +1,192 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+from perf_stats import STATS
+
+MASK = "<*>"
+# A digit and the rest of its token: integers, decimals, exponents, hex
+# ids, dates and versions alike. Starting on a digit keeps the scan cheap.
+NUMBER_PATTERN = re.compile(r"\d[\w.+-]*")
+SIMILARITY_THRESHOLD = 0.5  # share of equal tokens needed to join a template
+MAX_CLUSTERS = 200  # templates compared per (length, first token) leaf
+CACHED_MESSAGES = 100000  # masked messages remembered with their template
+
+
+def mask_numbers(message):
+    return NUMBER_PATTERN.sub(MASK, message)
+
+
+class TemplateMiner:
+    """
+    Online Drain-style template mining.
+
+    Numbers are masked first, then the tokens of a message are routed by
+    token count and first token to a short list of templates; the message
+    joins the most similar one if enough positions agree, turning the
+    positions that differ into wildcards, or starts a new template.
+    Template ids never change once handed out.
+    """
+
+    def __init__(self):
+        self.templates = []  # template id -> tokens
+        self._leaves = {}  # (token count, first token) -> template ids
+        self._masked = {}  # masked message -> template id
+
+    def add(self, message):
+        """
+        Return the template id for `message`, creating or widening a
+        template as needed.
+        """
+        masked = mask_numbers(message)
+        template_id = self._masked.get(masked)
+        if template_id is not None:
+            return template_id
+
+        tokens = masked.split()
+        first = tokens[0] if tokens and MASK not in tokens[0] else MASK
+        leaf = self._leaves.setdefault((len(tokens), first), [])
+        template_id = self._best_match(leaf, tokens)
+        if template_id is None:
+            template_id = len(self.templates)
+            self.templates.append(tokens)
+            if len(leaf) < MAX_CLUSTERS:
+                leaf.append(template_id)
+        else:
+            template = self.templates[template_id]
+            self.templates[template_id] = [
+                old if old == new else MASK for old, new in zip(template, tokens)
+            ]
+
+        if len(self._masked) >= CACHED_MESSAGES:
+            self._masked.clear()
+        self._masked[masked] = template_id
+        return template_id
+
+    def template_text(self, template_id):
+        return " ".join(self.templates[template_id])
+
+    def _best_match(self, leaf, tokens):
+        if not tokens:
+            return leaf[0] if leaf else None
+        best, best_similarity = None, SIMILARITY_THRESHOLD
+        for template_id in leaf:
+            template = self.templates[template_id]
+            same = sum(
+                1 for old, new in zip(template, tokens) if old == new or old == MASK
+            )
+            similarity = same / len(tokens)
+            if similarity >= best_similarity:
+                best, best_similarity = template_id, similarity
+        return best
+
+
+class TemplateIndex:
+    """
+    The template id of every row of a store, mined on a background thread
+    once loading finishes and extended as rows arrive. Rows not mined yet
+    are grouped apart under None.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.miner = TemplateMiner()
+        self.template_ids = array("I")
+        self.rows_indexed = 0
+        self._cancel_event = threading.Event()
+        self._thread = None
+        # The last rows grouped, how many of them were grouped by template,
+        # and template id -> [count, first time, last time] for those
+        self._grouped = (array("q"), 0, {})
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def build_in_background(self, row_end=None):
+        if self.building:
+            return
+        self._thread = threading.Thread(
+            target=self.extend, args=(row_end,), daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        # Returns the worker if it is still running; it stops at the next row
+        self._cancel_event.set()
+        return [self._thread] if self.building else []
+
+    def extend(self, row_end=None):
+        """
+        Mine the rows below `row_end` that are not mined yet.
+        """
+        messages = self.messages
+        row_end = len(messages) if row_end is None else min(row_end, len(messages))
+        add = self.miner.add
+        get_message = messages.get_message
+        template_ids = self.template_ids
+        with STATS.span("template mining") as span:
+            for row in range(self.rows_indexed, row_end):
+                if self._cancel_event.is_set():
+                    return
+                template_ids.append(add(get_message(row)))
+                self.rows_indexed = row + 1
+                span.add_rows(1)
+
+    def group(self, rows):
+        """
+        Group the sorted `rows` by template. Returns (template id, count,
+        first time, last time) tuples, most frequent first, with the
+        earliest and latest timestamp among each group's rows.
+
+        The groups of the previous call are kept: when the same rows come
+        back, with rows appended or more of them mined, only the rows that
+        were not grouped by template before are visited.
+        """
+        indexed = self.rows_indexed  # read first: these ids are complete
+        previous, done, groups = self._grouped
+        if len(rows) < len(previous) or rows[: len(previous)] != previous:
+            done, groups = 0, {}
+        mined = bisect_left(rows, indexed)
+
+        template_ids = self.template_ids
+        timestamps = self.messages.timestamps
+        for row in rows[done:mined]:
+            template_id = template_ids[row]
+            time = timestamps[row]
+            group = groups.get(template_id)
+            if group is None:
+                groups[template_id] = [1, time, time]
+            else:
+                group[0] += 1
+                if time < group[1]:
+                    group[1] = time
+                elif time > group[2]:
+                    group[2] = time
+        self._grouped = (rows, mined, groups)
+
+        result = [(template_id, *group) for template_id, group in groups.items()]
+        if mined < len(rows):
+            times = [timestamps[row] for row in rows[mined:]]
+            result.append((None, len(times), min(times), max(times)))
+        result.sort(key=lambda group: group[1], reverse=True)
+        return result
+
+    def rows_of(self, template_id, rows, limit):
+        """
+        Return up to `limit` of the `rows` in the group, and the group size.
+        """
+        template_ids = self.template_ids
+        indexed = self.rows_indexed
+        matching = [
+            row
+            for row in rows
+            if (template_ids[row] if row < indexed else None) == template_id
+        ]
+        return matching[:limit], len(matching)
+
+    def template_text(self, template_id):
+        if template_id is None:
+            return "(not grouped yet)"
+        return self.miner.template_text(template_id)
@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("tkinter", "multiprocessing", "zstandard")
+STARTUP_BUDGET_SECONDS = 0.5  # allowed on top of a bare interpreter start
+RUNS = 3
+
+LOG = (
+    "[2024-01-02 03:04:05.123][INFO][Planner] plan ready\n"
+    "  waypoints: 3\n"
+    "[2024-01-02 03:04:06.456][WARN][TrajectoryGenerator] Result.Error: late\n"
+    "[2024-01-02 03:04:07.789][INFO][Planner] plan done\n"
+)
+
+# Run the CLI like python -m log_parser, then report what it imported
+RUN_CLI = """
+import json, runpy, sys
+try:
+    runpy.run_module("log_parser", run_name="__main__", alter_sys=True)
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def run(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def best_time(*args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def write_log(tmp_path):
+    path = tmp_path / "sample.log"
+    path.write_text(LOG)
+    return str(path)
+
+
+def test_query_prints_matching_entries(tmp_path):
+    result = run("-m", "log_parser", write_log(tmp_path), "-m", "Planner")
+    assert result.stdout.splitlines() == [
+        "[2024-01-02 03:04:05.123][INFO][Planner] plan ready   waypoints: 3",
+        "[2024-01-02 03:04:07.789][INFO][Planner] plan done",
+    ]
+
+
+def test_query_does_not_import_heavy_modules(tmp_path):
+    result = run("-c", RUN_CLI, write_log(tmp_path), "-s", "result.error")
+    assert "Result.Error: late" in result.stdout
+    modules = json.loads(result.stderr.splitlines()[-1])
+    for name in HEAVY_MODULES:
+        assert name not in modules
+
+
+def test_query_starts_quickly(tmp_path):
+    path = write_log(tmp_path)
+    interpreter = best_time("-c", "pass")
+    query = best_time("-m", "log_parser", path, "-l", "WARN")
+    assert query - interpreter < STARTUP_BUDGET_SECONDS
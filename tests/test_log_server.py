@@ -0,0 +1,159 @@
+import socket
+import threading
+import time
+
+import pytest
+
+import log_server
+from log_parser import LogParser
+from log_server import ENTRY_OVERHEAD, LogServer, RingBuffer, entry_message
+
+HOST = "127.0.0.1"
+TIMEOUT_SECONDS = 5
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(ring=None):
+        ring = RingBuffer() if ring is None else ring
+        server = LogServer(LogParser(), ring, HOST, 0, 0)  # ephemeral ports
+        server.start_in_thread()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the server")
+        time.sleep(0.01)
+
+
+def entry_line(second, level, module, message):
+    return f"[2024-01-02 03:04:{second:02d}.250][{level}][{module}] {message}\n"
+
+
+def parse_text(tmp_path, text):
+    # What the file parser makes of the same bytes
+    path = tmp_path / "expected.log"
+    path.write_text(text)
+    messages = LogParser().parse(str(path))
+    return [
+        (
+            messages.timestamps[row],
+            messages.get_level(row),
+            messages.get_module(row),
+            messages.get_message(row),
+        )
+        for row in range(len(messages))
+    ]
+
+
+def as_tuples(entries):
+    return [(*entry[:3], entry_message(entry)) for entry in entries]
+
+
+def test_concurrent_tcp_senders_keep_continuation_lines(tmp_path, start_server):
+    server = start_server()
+    senders, count = 8, 50
+    texts = {
+        f"Sender{number}": "".join(
+            entry_line(i % 60, "INFO", f"Sender{number}", f"entry {i}")
+            + f"  detail {i}\n  more {i}\n"
+            for i in range(count)
+        )
+        for number in range(senders)
+    }
+
+    def send(text):
+        data = text.encode()
+        with socket.create_connection((HOST, server.tcp_port)) as connection:
+            # Odd-sized writes split lines across reads
+            for start in range(0, len(data), 777):
+                connection.sendall(data[start : start + 777])
+
+    threads = [threading.Thread(target=send, args=(text,)) for text in texts.values()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wait_for(lambda: server.ring.next_seq == senders * count)
+
+    _, entries = server.ring.since(0)
+    for module, text in texts.items():
+        received = [entry for entry in as_tuples(entries) if entry[2] == module]
+        assert received == parse_text(tmp_path, text)
+
+
+def test_udp_datagram_with_syslog_prefix(start_server):
+    server = start_server()
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        sender.sendto(
+            b"<13>" + entry_line(5, "WARN", "Udp", "hello").encode().rstrip(),
+            (HOST, server.udp_port),
+        )
+    wait_for(lambda: server.ring.next_seq == 1)
+
+    _, [entry] = server.ring.since(0)
+    assert entry[1:3] == ("WARN", "Udp")
+    assert entry_message(entry) == "hello"
+
+
+def test_disconnect_flushes_held_entries(monkeypatch, start_server):
+    # Keep the quiet-sender flush out of the way
+    monkeypatch.setattr(log_server, "PENDING_FLUSH_SECONDS", 60)
+    server = start_server()
+    with socket.create_connection((HOST, server.tcp_port)) as connection:
+        connection.sendall(
+            (entry_line(1, "INFO", "Tcp", "first") + "  continued\n").encode()
+        )
+        # No newline: the last line is only complete once the sender leaves
+        connection.sendall(entry_line(2, "ERROR", "Tcp", "last").encode().rstrip())
+        time.sleep(0.2)
+        assert server.ring.next_seq == 0  # the newest entry is still held
+    wait_for(lambda: server.ring.next_seq == 2)
+
+    _, entries = server.ring.since(0)
+    assert [entry_message(entry) for entry in entries] == [
+        "first   continued\n",
+        "last",
+    ]
+
+
+def test_quiet_sender_entry_is_released(start_server):
+    server = start_server()
+    with socket.create_connection((HOST, server.tcp_port)) as connection:
+        connection.sendall(entry_line(3, "INFO", "Tcp", "waiting").encode())
+        wait_for(lambda: server.ring.next_seq == 1)
+
+
+def test_ring_evicts_oldest_batches_and_spills_them(tmp_path, start_server):
+    lines = [entry_line(i, "INFO", "Udp", f"datagram {i:02d}") for i in range(20)]
+    kept = 5
+    spill_path = tmp_path / "spill.log"
+    ring = RingBuffer(kept * (len(lines[0]) + ENTRY_OVERHEAD), str(spill_path))
+    server = start_server(ring)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        for number, line in enumerate(lines):
+            # One datagram per batch, so eviction is per entry
+            sender.sendto(line.encode(), (HOST, server.udp_port))
+            wait_for(lambda: ring.next_seq == number + 1)
+    # Evicted batches are written out after the ring is updated
+    wait_for(lambda: ring.spilled == ring.first_seq)
+
+    assert ring.size <= ring.max_bytes
+    assert len(ring) == kept
+    assert ring.first_seq == ring.spilled == len(lines) - kept
+    first, entries = ring.since(0)
+    assert first == ring.first_seq
+    assert [entry[3].decode() for entry in entries] == lines[-kept:]
+
+    server.stop()  # closes the spill file
+    assert spill_path.read_text() == "".join(lines[:-kept])
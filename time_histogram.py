@@ -0,0 +1,80 @@
+from array import array
+
+DEFAULT_BUCKETS = 200
+
+
+class TimeHistogram:
+    """
+    Message counts per time bucket, split by level code.
+
+    The bucket grid starts on the time range of the first rows and doubles
+    its span whenever a row falls outside it. Doubling merges bucket pairs
+    exactly, so appended rows never force a rescan of the whole store.
+    """
+
+    def __init__(self, messages, buckets=DEFAULT_BUCKETS):
+        self.messages = messages
+        self.buckets = buckets
+        self.rows_indexed = 0
+        # (start time, bucket width, level code -> counts), replaced as a
+        # whole so readers on another thread see a consistent grid
+        self.bins = None
+
+    def extend(self, row_end=None):
+        """
+        Count the rows appended to the store since the last call.
+        """
+        messages = self.messages
+        row_end = len(messages) if row_end is None else row_end
+        start = self.rows_indexed
+        if row_end <= start:
+            return
+        timestamps = messages.timestamps[start:row_end]
+        level_codes = messages.level_codes[start:row_end]
+        self._cover(min(timestamps), max(timestamps))
+
+        low, width, counts = self.bins
+        while len(counts) < len(messages.levels):
+            counts.append(array("L", bytes(self.buckets * array("L").itemsize)))
+        last = self.buckets - 1
+        for timestamp, level_code in zip(timestamps, level_codes):
+            bucket = int((timestamp - low) / width)
+            counts[level_code][bucket if bucket < last else last] += 1
+        self.rows_indexed = row_end
+
+    def bucket_range(self, bucket):
+        low, width, _ = self.bins
+        return low + bucket * width, low + (bucket + 1) * width
+
+    def bucket_of(self, timestamp):
+        low, width, _ = self.bins
+        return max(0, min(self.buckets - 1, int((timestamp - low) / width)))
+
+    def _cover(self, low, high):
+        if self.bins is None:
+            width = (high - low) / self.buckets or 1.0 / self.buckets
+            self.bins = (low, width, [])
+            return
+
+        start, width, counts = self.bins
+        half = self.buckets // 2
+        while low < start or high > start + width * self.buckets:
+            # Double the span towards the side that overflowed, merging
+            # neighbouring buckets
+            merged = []
+            grow_down = low < start
+            for level_counts in counts:
+                pairs = [
+                    level_counts[i] + level_counts[i + 1]
+                    for i in range(0, self.buckets, 2)
+                ]
+                padding = [0] * (self.buckets - half)
+                if grow_down:
+                    merged.append(array("L", padding + pairs))
+                else:
+                    merged.append(array("L", pairs + padding))
+            if grow_down:
+                start -= width * self.buckets
+            width *= 2
+            counts = merged
+        self.bins = (start, width, counts)
@@ -0,0 +1,85 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+
+class TimeWindow:
+    """
+    Rows of a time window: every row in [row_low, row_high) except those in
+    `excluded`, plus the rows in `extra`.
+    """
+
+    def __init__(self, row_low, row_high, excluded, extra):
+        self.row_low = row_low
+        self.row_high = row_high
+        self.excluded = excluded
+        self.extra = extra
+
+
+class TimeIndex:
+    """
+    Resolve time windows to row ranges with bisect.
+
+    Logs are almost sorted by time: rows that keep up with the running
+    maximum timestamp form a sorted backbone, and the few that arrive late
+    go to a correction list that is checked separately. A window is the
+    backbone span between its two bisect points, patched with the late rows.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.sorted_rows = array("q")
+        self.sorted_times = array("d")
+        self.late_rows = array("q")
+        self.rows_indexed = 0
+
+    def extend(self, row_end=None):
+        """
+        Index the rows appended to the store since the last call.
+        """
+        timestamps = self.messages.timestamps
+        row_end = len(timestamps) if row_end is None else row_end
+        start = self.rows_indexed
+        if row_end <= start:
+            return
+        latest = self.sorted_times[-1] if self.sorted_times else float("-inf")
+        sorted_rows, sorted_times = self.sorted_rows, self.sorted_times
+        late_rows = self.late_rows
+        for row, timestamp in zip(range(start, row_end), timestamps[start:row_end]):
+            if timestamp >= latest:
+                latest = timestamp
+                sorted_rows.append(row)
+                sorted_times.append(timestamp)
+            elif len(sorted_times) > 1 and sorted_times[-2] <= timestamp:
+                # The backbone tip was a lone jump ahead; demote it instead of
+                # every row that follows it
+                insort(late_rows, sorted_rows.pop())
+                sorted_times.pop()
+                latest = timestamp
+                sorted_rows.append(row)
+                sorted_times.append(timestamp)
+            else:
+                late_rows.append(row)
+        self.rows_indexed = row_end
+
+    def window(self, start_time, end_time, row_limit=None):
+        row_limit = self.rows_indexed if row_limit is None else row_limit
+        limit = bisect_left(self.sorted_rows, row_limit)
+        low = bisect_left(self.sorted_times, start_time, 0, limit)
+        high = bisect_right(self.sorted_times, end_time, 0, limit)
+        if low < high:
+            row_low = self.sorted_rows[low]
+            row_high = self.sorted_rows[high - 1] + 1
+        else:
+            row_low = row_high = 0
+
+        excluded = set()
+        extra = []
+        timestamps = self.messages.timestamps
+        for row in self.late_rows[: bisect_left(self.late_rows, row_limit)]:
+            inside = start_time <= timestamps[row] <= end_time
+            if row_low <= row < row_high:
+                if not inside:
+                    excluded.add(row)
+            elif inside:
+                extra.append(row)
+        return TimeWindow(row_low, row_high, excluded, extra)
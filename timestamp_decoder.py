@@ -0,0 +1,107 @@
+from array import array
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+PREFIX_LENGTH = 16  # "YYYY-MM-DD HH:MM"
+CACHED_PREFIXES = 65536  # about six weeks of minutes
+
+
+class TimestampDecoder:
+    """
+    Turn log timestamps ("2024-12-09 12:30:05.123") into the same floats
+    as datetime.strptime(text, TIMESTAMP_FORMAT).timestamp(), bit for bit.
+
+    The local-time epoch of each "date hour:minute" prefix is worked out
+    once with strptime and cached; per line only the seconds and fraction
+    are read. timestamp() is float(whole seconds) + microseconds / 1e6, so
+    adding the cached whole seconds and doing the same sum gives the exact
+    result. A minute whose epoch is not linear in its seconds (a UTC offset
+    change that is not on a minute boundary) is marked irregular and its
+    lines go through strptime, as does anything that is not fixed width.
+    Accepts str or bytes.
+    """
+
+    def __init__(self):
+        self._minutes = {}  # prefix -> epoch seconds of its second 0, or None
+
+    def decode(self, text):
+        minute = self._minutes.get(text[:PREFIX_LENGTH], False)
+        if minute is False:
+            minute = self._cache_prefix(text)
+        if minute is not None:
+            timestamp = _decode_seconds(minute, text)
+            if timestamp is not None:
+                return timestamp
+        return self._strptime(text)
+
+    def decode_many(self, texts):
+        """
+        Decode a batch of timestamps into an array of doubles. Runs of
+        entries from the same minute, the usual case, share one lookup.
+        """
+        timestamps = array("d")
+        append = timestamps.append
+        minutes = self._minutes
+        last_prefix = None
+        minute = None
+        for text in texts:
+            prefix = text[:PREFIX_LENGTH]
+            if prefix != last_prefix:
+                last_prefix = prefix
+                minute = minutes.get(prefix, False)
+                if minute is False:
+                    minute = self._cache_prefix(text)
+            timestamp = None
+            if minute is not None:
+                timestamp = _decode_seconds(minute, text)
+            append(self._strptime(text) if timestamp is None else timestamp)
+        return timestamps
+
+    def _cache_prefix(self, text):
+        prefix = text[:PREFIX_LENGTH]
+        if len(self._minutes) >= CACHED_PREFIXES:
+            self._minutes.clear()
+        minute = None
+        try:
+            if isinstance(prefix, bytes):
+                prefix_text = prefix.decode("ascii")
+            else:
+                prefix_text = prefix
+            first = datetime.strptime(prefix_text + ":00", "%Y-%m-%d %H:%M:%S")
+            last = datetime.strptime(prefix_text + ":59", "%Y-%m-%d %H:%M:%S")
+            start = int(first.timestamp())
+            if last.timestamp() == start + 59:
+                minute = start
+        except (UnicodeDecodeError, ValueError):
+            pass  # not the fixed-width layout; strptime gets the whole text
+        self._minutes[prefix] = minute
+        return minute
+
+    def _strptime(self, text):
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+        return datetime.strptime(text, TIMESTAMP_FORMAT).timestamp()
+
+
+def _decode_seconds(minute, text):
+    # The ":SS.ffffff" tail on top of the minute's epoch; None when the tail
+    # is not two seconds digits and one to six fraction digits
+    seconds = text[17:19]
+    fraction = text[20:]
+    if (
+        text[16:17] not in (":", b":")
+        or text[19:20] not in (".", b".")
+        or not 0 < len(fraction) <= 6
+        or not (seconds.isdigit() and fraction.isdigit())
+        or not (seconds.isascii() and fraction.isascii())
+    ):
+        return None
+    second = int(seconds)
+    if second > 59:
+        return None
+    # Same sum as datetime.timestamp(): whole seconds plus microseconds / 1e6
+    return (minute + second) + int(fraction) * _SCALE[len(fraction)] / 1e6
+
+
+# Multiplier that right-pads an n digit fraction to microseconds
+_SCALE = [0, 100000, 10000, 1000, 100, 10, 1]
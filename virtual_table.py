@@ -0,0 +1,193 @@
+import os
+import tkinter as tk
+import tkinter.ttk as ttk
+from bisect import bisect_left
+
+OVERSCAN = 20  # rows kept as real items above and below the visible window
+WHEEL_ROWS = 3  # rows scrolled per mouse wheel notch
+
+
+class VirtualLogTable:
+    """
+    Show a row-index vector in a Treeview without creating an item per row.
+
+    Only the visible window plus a small overscan exists as Treeview items;
+    the vertical scrollbar is driven from the full row count, so redraw cost
+    depends on the height of the widget, not on how many rows match.
+    Item ids are positions in the row vector; the selection is remembered
+    as store rows so it survives scrolling and row vector changes.
+    """
+
+    def __init__(self, tree, scrollbar, format_timestamp):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.format_timestamp = format_timestamp
+        self.messages = None
+        self.rows = []
+        self.first = 0  # position of the top visible row
+        self.window_start = 0  # position of the first rendered item
+        self.window_end = 0
+        self.selected_rows = set()
+        self.stick_to_end = False  # set while rows are being appended live
+        self._user_selecting = False
+
+        self.scrollbar.config(command=self.on_scrollbar)
+        self.tree.config(yscrollcommand=self.on_tree_scrolled)
+        self.tree.bind("<Configure>", lambda event: self.render())
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(WHEEL_ROWS))
+        self.tree.bind("<ButtonPress-1>", self._on_user_select, add="+")
+        self.tree.bind("<KeyPress>", self._on_user_select, add="+")
+
+    def set_rows(self, messages, rows):
+        # While rows are appended live, a view of the same store that was
+        # scrolled down to its last row stays at the bottom; anything else
+        # keeps its position, and a new store starts at the top
+        at_end = (
+            self.stick_to_end
+            and messages is self.messages
+            and self.first > 0
+            and self.first + self.visible_count() >= len(self.rows)
+        )
+        if messages is not self.messages:
+            self.selected_rows = set()
+            self.first = 0
+        self.messages = messages
+        self.rows = rows
+        if at_end and messages is not None:
+            self.first = len(rows)
+        self.first = max(0, min(self.first, len(rows) - self.visible_count()))
+        self.render()
+
+    def remember_selection(self):
+        """
+        Record the selected items as store rows. Called on every selection
+        change; changes made by render() only restore rows already known.
+        """
+        in_tree = {self.rows[int(iid)] for iid in self.tree.selection()}
+        if self._user_selecting:
+            self._user_selecting = False
+            self.selected_rows = in_tree
+        else:
+            window = set(self.rows[self.window_start : self.window_end])
+            self.selected_rows = (self.selected_rows - window) | in_tree
+
+    def position_of(self, row):
+        # Filtered rows are kept in store order, so a row is found by bisect
+        position = bisect_left(self.rows, row)
+        if position < len(self.rows) and self.rows[position] == row:
+            return position
+        return None
+
+    def select_row(self, row):
+        """
+        Select a store row and scroll it into view. Returns False when the
+        current filters hide it.
+        """
+        position = self.position_of(row)
+        if position is None:
+            return False
+        self.selected_rows = {row}
+        visible = self.visible_count()
+        if not self.first <= position < self.first + visible:
+            self.first = max(0, min(position - visible // 2, len(self.rows) - visible))
+        self.render()
+        self.tree.focus(str(position))
+        self.tree.see(str(position))
+        return True
+
+    def visible_count(self):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # One row's worth of height goes to the headings
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def render(self):
+        visible = self.visible_count()
+        total = len(self.rows)
+
+        self.window_start = max(0, self.first - OVERSCAN)
+        self.window_end = min(total, self.first + visible + OVERSCAN)
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+
+        messages = self.messages
+        for position in range(self.window_start, self.window_end):
+            row = self.rows[position]
+            self.tree.insert(
+                "",
+                tk.END,
+                iid=str(position),
+                values=(
+                    self.format_timestamp(messages.timestamps[row]),
+                    messages.get_level(row),
+                    messages.get_module(row),
+                    messages.get_message(row),
+                    os.path.basename(messages.get_source(row)),
+                ),
+            )
+
+        kept = [
+            str(position)
+            for position in range(self.window_start, self.window_end)
+            if self.rows[position] in self.selected_rows
+        ]
+        self.tree.selection_set(kept)
+
+        window = self.window_end - self.window_start
+        if window:
+            self.tree.yview_moveto((self.first - self.window_start) / window)
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.rows)
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(
+            self.first / total, min(1, (self.first + self.visible_count()) / total)
+        )
+
+    def scroll_to(self, position):
+        position = max(0, min(position, len(self.rows) - self.visible_count()))
+        if position != self.first:
+            self.first = position
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.rows)))
+        elif action == "scroll":
+            step = self.visible_count() if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+    def on_mouse_wheel(self, event):
+        return self.scroll_by(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+
+    def _on_user_select(self, event):
+        self._user_selecting = True
+
+    def on_tree_scrolled(self, low, high):
+        # The tree scrolled itself (keyboard navigation, see()); work out the
+        # new top row and extend the window when it nears a rendered edge
+        window = self.window_end - self.window_start
+        if not window:
+            return
+        first = self.window_start + round(float(low) * window)
+        if first == self.first:
+            return
+        self.first = first
+        last = first + self.visible_count()
+        near_top = first - self.window_start < OVERSCAN // 2 and self.window_start > 0
+        near_bottom = (
+            self.window_end - last < OVERSCAN // 2 and self.window_end < len(self.rows)
+        )
+        if near_top or near_bottom:
+            self.tree.after_idle(self.render)
+        else:
+            self.update_scrollbar()